@@ -0,0 +1,80 @@
+"""
+Compare the compiled drive-detail parser against the original chain of
+`str.split` calls over a season's worth of synthesized drive summaries
+
+Usage: python benchmarks/bench_drive_details.py [--drives N] [--repeat N]
+"""
+import argparse
+import random
+import timeit
+
+from ff_app.historical.drive_details import (
+    drive_details_frame, parse_drive_details_many)
+
+
+TEAMS = ['Texas', 'Kansas State', 'Texas A&M', 'Ohio State', 'Miami (OH)',
+         'San José State', 'North Carolina', 'UL Monroe']
+RESULTS = ['Touchdown', 'Rushing TD', 'Field Goal', 'Punt', 'Interception',
+           'Fumble', 'Downs', 'Missed FG', 'End of Half', 'Safety']
+
+
+def split_drive_summary(summary_str):
+    """
+    Original string-splitting parse from `ScrapeGamePlays.drive_summary`
+    """
+    s_dict = {}
+    s_dict['drive_team'] = summary_str.split(' drive')[0]
+    s_dict['num_plays'] = int(summary_str.split('drive: ')[1].split(' play')[0])
+    if 'plays' in summary_str:
+        s_dict['num_yards'] = int(summary_str.split('plays ')[1].split(' yard')[0])
+    else:
+        s_dict['num_yards'] = int(summary_str.split('play ')[1].split(' yard')[0])
+    if 'yards' in summary_str:
+        s_dict['drive_time'] = summary_str.split('yards, ')[1].split()[0]
+    else:
+        s_dict['drive_time'] = summary_str.split('yard, ')[1].split()[0]
+    s_dict['drive_result'] = summary_str.split(s_dict['drive_team'])[2].split(',')[0].strip()
+    return s_dict
+
+
+def drive_summaries(drives=20000, seed=0):
+    rng = random.Random(seed)
+    summaries = []
+    for _ in range(drives):
+        team = rng.choice(TEAMS)
+        plays = rng.randint(1, 15)
+        yards = rng.randint(-10, 99)
+        summaries.append(
+            f'{team} drive: {plays} play{"s" if plays > 1 else ""} '
+            f'{yards} yard{"s" if yards != 1 else ""}, '
+            f'{rng.randint(0, 9)}:{rng.randint(0, 59):02d} '
+            f'{team} {rng.choice(RESULTS)}, '
+            f'{rng.randint(0, 50)}-{rng.randint(0, 50)}')
+    return summaries
+
+
+def main(drives=20000, repeat=3):
+    summaries = drive_summaries(drives)
+    for summary_str, details in zip(summaries,
+                                    parse_drive_details_many(summaries)):
+        expected = split_drive_summary(summary_str)
+        assert (details.drive_team, details.num_plays, details.num_yards,
+                details.result_text) == (
+            expected['drive_team'], expected['num_plays'],
+            expected['num_yards'], expected['drive_result'])
+
+    print(f'{drives} drive summaries')
+    for name, func in [
+            ('str.split', lambda: [split_drive_summary(s) for s in summaries]),
+            ('regex', lambda: parse_drive_details_many(summaries)),
+            ('regex frame', lambda: drive_details_frame(summaries))]:
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        print(f'{name:>12}: best {best * 1000:8.1f} ms over {repeat} runs')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--drives', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(drives=args.drives, repeat=args.repeat)
@@ -0,0 +1,134 @@
+"""
+Compare the one-pass drive index of `ScrapeGamePlays.all_drives` against
+the original per-drive `find`/`find_all` scans of the whole page
+
+No ESPN play-by-play page is saved in the repo, so the benchmark
+synthesizes one in the same markup the scraper reads. It has an
+accordion of drives with summary links and play lists, surrounded by
+navigation and page furniture. The html5lib parse is timed once and
+then excluded from the comparison.
+
+Usage: python benchmarks/bench_game_plays.py [--drives N] [--repeat N]
+"""
+import argparse
+import random
+import time
+import timeit
+from types import SimpleNamespace
+
+from ff_app.historical.scrape_game_details import ScrapeGamePlays
+
+
+GAME_ID = '401310757'
+TEAMS = {'home': ('TEX', 'Texas'), 'away': ('KSU', 'Kansas State')}
+DOWNS = ['1st', '2nd', '3rd', '4th']
+RESULTS = ['Touchdown', 'Field Goal', 'Punt', 'Interception', 'Fumble',
+           'Downs', 'Missed FG']
+
+
+class ScanGamePlays(ScrapeGamePlays):
+    """
+    Original lookups: every drive searches the full page for its summary
+    link and play panel
+    """
+    def get_drive_ids(self):
+        return [x.find("a")['aria-controls'] for x in self.request_data.find_all("div", class_='accordion-header')]
+
+    def get_raw_drive_summary(self, drive_id):
+        return self.request_data.find("a", attrs={'href': drive_id})
+
+    def get_raw_drive_plays(self, drive_id):
+        return self.request_data.find("div", id=drive_id).find("ul", attrs={'class': 'drive-list'})
+
+
+def drive_markup(game_id, number, scores, rng):
+    side = 'home' if number % 2 else 'away'
+    abbr, team = TEAMS[side]
+    drive_id = f'gp-playbyplay-{game_id}-{number}'
+    plays = rng.randint(1, 14)
+    yards = rng.randint(-5, 80)
+    result = rng.choice(RESULTS)
+    if result == 'Touchdown':
+        scores[side] += 7
+    elif result == 'Field Goal':
+        scores[side] += 3
+    details = (f'{team} drive: {plays} play{"s" if plays > 1 else ""} '
+               f'{yards} yard{"s" if yards != 1 else ""}, '
+               f'{rng.randint(0, 7)}:{rng.randint(0, 59):02d} '
+               f'{team} {result}, {scores["home"]}-{scores["away"]}')
+    items = ''.join(
+        '<li class=""><h3>{}</h3><p><span class="post-play">\n'
+        '{} {} for {} yds to the {} {}\n</span></p></li>'.format(
+            f'{rng.choice(DOWNS)} and {rng.randint(1, 15)} at {abbr} '
+            f'{rng.randint(1, 50)}', team, rng.choice(['run', 'pass']),
+            rng.randint(-3, 40), abbr, rng.randint(1, 50))
+        for _ in range(plays))
+    if number % 8 == 0:
+        items += '<li class="half-time"><h3>End of Quarter</h3></li>'
+    return (
+        '<li class="accordion-item">'
+        '<div class="accordion-header">'
+        f'<a href="{drive_id}" aria-controls="{drive_id}" '
+        'data-toggle="collapse" class="collapsed">'
+        '<span class="home"><span class="team-name">{}</span>'
+        '<span class="team-score">{}</span></span>'
+        '<span class="away"><span class="team-name">{}</span>'
+        '<span class="team-score">{}</span></span>'
+        '<span class="drive-details">{}</span></a></div>'
+        f'<div id="{drive_id}" class="accordion-content collapse">'
+        '<div class="content"><ul class="drive-list">{}</ul></div></div>'
+        '</li>').format(TEAMS['home'][0], scores['home'], TEAMS['away'][0],
+                        scores['away'], details, items)
+
+
+def game_page(game_id=GAME_ID, drives=28, seed=0):
+    """
+    HTML for a play-by-play page with `drives` drives
+    """
+    rng = random.Random(seed)
+    scores = {'home': 0, 'away': 0}
+    nav = ''.join(f'<li><a href="/college-football/team/_/id/{i}">'
+                  f'Team {i}</a></li>' for i in range(400))
+    furniture = ''.join(f'<div class="module"><div class="headline">'
+                        f'<a href="/story/{i}">Story {i}</a></div>'
+                        f'<p>Lorem ipsum dolor sit amet {i}</p></div>'
+                        for i in range(600))
+    accordion = ''.join(drive_markup(game_id, n, scores, rng)
+                        for n in range(1, drives + 1))
+    return ('<html><head><title>Play-by-Play</title>'
+            '<script>window.espn = {};</script></head><body>'
+            f'<nav><ul>{nav}</ul></nav>'
+            f'<div id="gamepackage-play-by-play"><ul class="css-accordion">'
+            f'{accordion}</ul></div>'
+            f'<section id="pane-footer">{furniture}</section>'
+            '</body></html>')
+
+
+def main(drives=28, repeat=5):
+    response = SimpleNamespace(text=game_page(drives=drives))
+    start = time.perf_counter()
+    indexed = ScrapeGamePlays(GAME_ID, request_instance=response)
+    print(f'{drives} drives, {len(response.text) / 1e3:.0f} KB page; '
+          f'html5lib parse {time.perf_counter() - start:.2f} s')
+
+    scanned = ScanGamePlays(GAME_ID, request_instance=response)
+    scanned.request_data = indexed.request_data
+    assert indexed.all_drives() == scanned.all_drives()
+    assert indexed.number_of_drives == drives
+
+    def indexed_drives():
+        indexed._drive_index = None
+        return indexed.all_drives()
+
+    for name, func in [('one-pass index', indexed_drives),
+                       ('per-drive scan', scanned.all_drives)]:
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        print(f'{name:>15}: best {best * 1000:8.1f} ms over {repeat} runs')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--drives', type=int, default=28)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    main(drives=args.drives, repeat=args.repeat)
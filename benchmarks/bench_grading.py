@@ -0,0 +1,107 @@
+"""
+Time `grading.grade_picks` on a synthesized league season and check it
+against a plain loop over players and picks
+
+Usage: python benchmarks/bench_grading.py [--players N] [--weeks N]
+       [--games N] [--repeat N]
+"""
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from ff_app import data_prep, grading
+
+
+def season(players=200, weeks=15, games=60, seed=0):
+    """
+    Picks view, scoreboard results and each player's picks for a season
+    """
+    rng = np.random.default_rng(seed)
+    n = weeks * games
+    teams = np.array([f'T{i:03d}' for i in range(2 * n)])
+    home, away = teams[:n], teams[n:]
+    fav_home = rng.random(n) < 0.6
+    lines = pd.DataFrame({
+        'Week': np.repeat(np.arange(1, weeks + 1), games),
+        'Mandatory': np.where(rng.random(n) < 0.05, 'Y', ''),
+        'Favorite': np.where(fav_home, home, away),
+        'Location': np.where(fav_home, 'vs', '@'),
+        'Underdog': np.where(fav_home, away, home),
+        'Spread': -np.round(rng.integers(0, 60, n) / 2, 1),
+    })
+    results = pd.DataFrame({
+        'week': lines['Week'], 'home_abbr': home, 'away_abbr': away,
+        'home_score': rng.integers(0, 60, n),
+        'away_score': rng.integers(0, 60, n),
+        'game_complete': rng.random(n) < 0.97,
+    })
+    player_picks = {}
+    for player in range(players):
+        picks = lines.copy()
+        choice = rng.random(n)
+        picks['Pick'] = np.where(choice < 0.48, lines['Favorite'],
+                                 np.where(choice < 0.96, lines['Underdog'],
+                                          ''))
+        player_picks[f'player{player}'] = picks
+    return lines, results, player_picks
+
+
+def loop_grade(lines, results, player_picks):
+    """
+    Reference grading with one Python iteration per pick
+    """
+    scores = {k: (h, a, c) for k, h, a, c in zip(
+        grading.result_keys(results), results['home_score'],
+        results['away_score'], results['game_complete'])}
+    graded = {}
+    for player, picks in player_picks.items():
+        row = {}
+        for key, fav, loc, dog, spread, mandatory, pick in zip(
+                data_prep.game_keys(picks), picks['Favorite'],
+                picks['Location'], picks['Underdog'], picks['Spread'],
+                picks['Mandatory'], picks['Pick']):
+            home_score, away_score, complete = scores[key]
+            if not complete:
+                row[key] = grading.PENDING
+                continue
+            fav_score, dog_score = (home_score, away_score) if loc == 'vs' \
+                else (away_score, home_score)
+            cover = np.sign(fav_score - dog_score + spread)
+            if pick == fav:
+                row[key] = cover
+            elif pick == dog:
+                row[key] = -cover
+            else:
+                row[key] = grading.LOSS if mandatory == 'Y' \
+                    else grading.NO_PICK
+        graded[player] = row
+    return pd.DataFrame.from_dict(graded, orient='index')
+
+
+def main(players=200, weeks=15, games=60, repeat=3):
+    lines, results, player_picks = season(players, weeks, games)
+    outcomes = grading.grade_picks(lines, results, player_picks)
+    expected = loop_grade(lines, results, player_picks)
+    assert (outcomes.to_numpy() == expected[outcomes.columns].to_numpy()).all()
+
+    print(f'{players} players x {len(lines)} games '
+          f'({players * len(lines)} picks)')
+    for name, func in [
+            ('vectorized', lambda: grading.grade_picks(lines, results,
+                                                       player_picks)),
+            ('loop', lambda: loop_grade(lines, results, player_picks))]:
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        print(f'  {name:>10}: best {best * 1000:9.1f} ms over {repeat} runs')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--weeks', type=int, default=15)
+    parser.add_argument('--games', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(players=args.players, weeks=args.weeks, games=args.games,
+         repeat=args.repeat)
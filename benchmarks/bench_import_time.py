@@ -0,0 +1,118 @@
+"""
+Guard the startup cost of `python -m ff_app.execution`
+
+Imports `ff_app.execution` in fresh interpreters under `-X importtime` and
+fails if the best cumulative import time is over the budget. The check
+also fails if the Google API client, the season store, bs4 or YAML are
+loaded by the import. A CSV-only data pull against the local ESPN
+stand-in must also finish without loading the Google stack or the season
+store. pyarrow itself is not checked since pandas imports it when it is
+installed.
+
+Usage: python benchmarks/bench_import_time.py [--repeat N] [--budget-ms MS]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Heavy dependencies that only the code paths needing them may import
+DEFERRED_MODULES = ['googleapiclient', 'google.oauth2', 'oauth2client',
+                    'ff_app.google_io', 'ff_app.season_store', 'bs4',
+                    'html5lib']
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+CSV_PULL_SCRIPT = """
+import sys, tempfile
+sys.path.insert(0, {benchmark_dir!r})
+from local_espn import LocalEspnServer
+from ff_app.config import CONFIG
+CONFIG['cache']['enabled'] = False
+CONFIG['output'] = tempfile.mkdtemp()
+from ff_app import execution
+with LocalEspnServer() as server:
+    server.patch_config()
+    execution.run_data_pull(week=13, year=2021,
+                            output_dir=tempfile.mkdtemp(),
+                            output_formats=['csv'])
+print(' '.join(sorted(sys.modules)))
+"""
+
+
+def loaded_modules(names, modules):
+    return [name for name in names
+            if any(m == name or m.startswith(name + '.') for m in modules)]
+
+
+def import_profile(module='ff_app.execution'):
+    """
+    Import `module` in a fresh interpreter under `-X importtime`; pass
+    `None` to profile interpreter startup alone
+
+    Returns
+    -------
+    cumulative_us : int
+        Cumulative import time of `module` in microseconds
+
+    timings : dict
+        Cumulative import time in microseconds keyed by module name
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         f'import {module}' if module else 'pass'],
+        capture_output=True, text=True, check=True)
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(2))
+    return timings.get(module, 0), timings
+
+
+def csv_pull_modules():
+    result = subprocess.run(
+        [sys.executable, '-c',
+         CSV_PULL_SCRIPT.format(benchmark_dir=BENCHMARK_DIR)],
+        capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def main(repeat=5, budget_ms=300.):
+    runs = [import_profile() for _ in range(repeat)]
+    best_us, timings = min(runs, key=lambda run: run[0])
+    print(f'import ff_app.execution: best {best_us / 1000:8.1f} ms '
+          f'over {repeat} runs (budget {budget_ms:.0f} ms)')
+
+    _, startup = import_profile(None)
+    top_level = sorted(((us, name) for name, us in timings.items()
+                        if '.' not in name and name not in startup),
+                       reverse=True)[:8]
+    for us, name in top_level:
+        print(f'  {name:<24} {us / 1000:8.1f} ms')
+
+    failures = []
+    if best_us > budget_ms * 1000:
+        failures.append(f'import took {best_us / 1000:.1f} ms')
+    eager = loaded_modules(DEFERRED_MODULES + ['yaml'], timings)
+    if eager:
+        failures.append(f'imported eagerly: {", ".join(eager)}')
+    pulled = loaded_modules(DEFERRED_MODULES[:5], csv_pull_modules())
+    if pulled:
+        failures.append(f'CSV-only pull imported: {", ".join(pulled)}')
+
+    if failures:
+        sys.exit('FAILED: ' + '; '.join(failures))
+    print('CSV-only pull left the Google stack and season store unloaded')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=300.)
+    args = parser.parse_args()
+    main(repeat=args.repeat, budget_ms=args.budget_ms)
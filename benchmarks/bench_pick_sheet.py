@@ -0,0 +1,70 @@
+"""
+Compare the column-wise `data_prep.pick_sheet_summary` against the
+row-wise `apply(get_short_data)` build it replaced, on the week saved in
+`documentation/raw_scrape.txt` repeated to multi-season size
+
+Usage: python benchmarks/bench_pick_sheet.py [--seasons N] [--repeat N]
+"""
+import argparse
+import timeit
+
+import pandas as pd
+
+from local_espn import WEEKS_PER_SEASON, SavedResponse
+from ff_app import data_prep
+from ff_app.scrape_espn import GetGameData
+
+
+def rowwise_pick_sheet_summary(game_data):
+    columns = ['Week', 'Datetime', 'Mandatory', 'Favorite', 'Location',
+               'Underdog', 'Spread', 'Total', 'Implied Score']
+    short_df = pd.DataFrame.from_records(
+        columns=columns,
+        data=game_data.apply(data_prep.get_short_data, axis=1))
+    short_df['Total'] = short_df['Total'].fillna('')
+    return short_df
+
+
+def load_week_frame():
+    pull = GetGameData(week_num=13, year=2021)
+    pull.refresh(SavedResponse())
+    games = pull.game_data_df
+    full_df = games[games['has_odds'].fillna(False).astype(bool)].copy()
+    full_df['Week'] = 13
+    full_df['Datetime'] = full_df['kickoff']
+    return full_df.reset_index(drop=True)
+
+
+def build_frame(week_df, seasons):
+    weeks = []
+    for i in range(max(1, seasons * WEEKS_PER_SEASON)):
+        week = week_df.copy()
+        week['Week'] = i % WEEKS_PER_SEASON + 1
+        weeks.append(week)
+    return pd.concat(weeks, ignore_index=True)
+
+
+def main(seasons=3, repeat=3):
+    week_df = load_week_frame()
+
+    for n in sorted(set([0, seasons])):
+        frame = build_frame(week_df, n)
+        expected = rowwise_pick_sheet_summary(frame)
+        result = data_prep.pick_sheet_summary(frame)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+        print(f'{len(frame)} games')
+        for name, func in [('vectorized', data_prep.pick_sheet_summary),
+                           ('row-wise', rowwise_pick_sheet_summary)]:
+            times = timeit.repeat(lambda: func(frame), number=1,
+                                  repeat=repeat)
+            print(f'{name:>12}: best {min(times) * 1000:9.1f} ms '
+                  f'over {repeat} runs')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--seasons', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(seasons=args.seasons, repeat=args.repeat)
@@ -0,0 +1,82 @@
+"""
+Compare peak memory and output size of streaming play-by-play records to
+gzip JSON-lines against building the nested `all_drives` dicts of every
+game and dumping them with `json.dump(indent=4)`
+
+Game pages are synthesized as in `bench_game_plays.py` and parsed one at
+a time. Peak memory is traced with tracemalloc, so it includes the parse
+tree of the page being processed, which is the same for both writers.
+
+Usage: python benchmarks/bench_play_records.py [--games N ...]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from bench_game_plays import game_page
+from ff_app.historical.jsonl import JsonlWriter, read_jsonl
+from ff_app.historical.scrape_game_details import ScrapeGamePlays
+
+
+def parsed_games(games, drives=28):
+    """
+    Yield parsed ScrapeGamePlays for `games` synthesized games, freeing
+    each parse tree once the game has been processed
+    """
+    for i in range(games):
+        game_id = str(401300000 + i)
+        plays = ScrapeGamePlays(game_id, request_instance=SimpleNamespace(
+            text=game_page(game_id=game_id, drives=drives, seed=i)))
+        yield plays
+        plays.request_data.decompose()
+
+
+def nested_dump(games, path):
+    season = {}
+    for plays in parsed_games(games):
+        season[plays.game_id] = plays.all_drives()
+    with open(path, 'w') as f:
+        json.dump(season, f, indent=4)
+
+
+def stream_records(games, path):
+    with JsonlWriter(path) as writer:
+        for plays in parsed_games(games):
+            writer.write_many(plays.iter_records())
+
+
+def measure(func, games, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(games, path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, os.path.getsize(path), elapsed
+
+
+def main(game_counts=(5, 20)):
+    out_dir = tempfile.mkdtemp()
+    for games in game_counts:
+        print(f'{games} games')
+        for name, func, filename in [
+                ('nested json', nested_dump, 'season.json'),
+                ('jsonl.gz', stream_records, 'season.jsonl.gz')]:
+            path = os.path.join(out_dir, f'{games}_{filename}')
+            peak, size, elapsed = measure(func, games, path)
+            print(f'  {name:>12}: peak {peak / 1e6:7.2f} MB, '
+                  f'file {size / 1e3:8.1f} KB, {elapsed:.1f} s')
+        records = sum(1 for _ in read_jsonl(
+            os.path.join(out_dir, f'{games}_season.jsonl.gz')))
+        print(f'  {records} records streamed')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--games', type=int, nargs='+', default=[5, 20])
+    args = parser.parse_args()
+    main(game_counts=args.games)
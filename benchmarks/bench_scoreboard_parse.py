@@ -0,0 +1,33 @@
+"""
+Compare the regex payload extractor against the html5lib parse of the
+scoreboard page saved in `documentation/raw_scrape.txt`
+
+Usage: python benchmarks/bench_scoreboard_parse.py [--repeat N]
+"""
+import argparse
+import timeit
+
+from local_espn import SavedResponse
+from ff_app.scrape_espn import GetGameData
+
+
+def main(repeat=5):
+    response = SavedResponse()
+    pull = GetGameData(week_num=13, year=2021)
+
+    fast = pull.fast_parse_request_data(response)
+    soup = pull.soup_parse_request_data(response)
+    assert fast == soup, "Extractors returned different payloads"
+
+    for name, func in [('regex', pull.fast_parse_request_data),
+                       ('html5lib', pull.soup_parse_request_data)]:
+        times = timeit.repeat(lambda: func(response), number=1, repeat=repeat)
+        print(f'{name:>10}: best {min(times) * 1000:9.1f} ms '
+              f'over {repeat} runs')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    main(repeat=args.repeat)
@@ -0,0 +1,94 @@
+"""
+Compare reading every player's sheet with one `values.get` each against
+`GoogleSheetsReadWrite.read_many`, on a local fake Sheets server holding
+the picks view of the week saved in `documentation/raw_scrape.txt`, and
+check both return the same typed frames
+
+Usage: python benchmarks/bench_sheet_reads.py [--players N] [--weeks N]
+       [--latency SECONDS] [--chunk-size N] [--repeat N]
+"""
+import argparse
+import timeit
+
+import pandas as pd
+from google.auth.credentials import AnonymousCredentials
+
+from fake_sheets import FakeSheetsServer
+from local_espn import SavedResponse
+from ff_app import data_prep, google_io
+from ff_app.scrape_espn import GetGameData
+
+
+def player_sheets(players, weeks):
+    """
+    Sheet rows of each player: the picks view of `weeks` weeks plus a
+    'Pick' column, with some picks left blank
+    """
+    pull = GetGameData(week_num=13, year=2021)
+    pull.refresh(SavedResponse())
+    picks_df, _ = data_prep.create_sheet_outputs(pull.game_data_df, 13)
+    picks_df['Datetime'] = data_prep.format_datetime(picks_df['Datetime'])
+    picks_df = pd.concat([picks_df.assign(Week=week)
+                          for week in range(1, weeks + 1)],
+                         ignore_index=True)
+    rows = picks_df.astype(object).fillna('').astype(str).values.tolist()
+
+    sheets = {}
+    for player in range(players):
+        picks = [row[3] if (i + player) % 3 else
+                 row[5] if (i + player) % 5 else '' for i, row in
+                 enumerate(rows)]
+        # The API drops trailing empty cells, so blank picks are cut off
+        sheets[f'player{player}'] = [list(picks_df.columns) + ['Pick']] + [
+            row + [pick] if pick else row for row, pick in zip(rows, picks)]
+    return sheets
+
+
+def read_serial(io, names):
+    return {name: google_io.coerce_dtypes(io.read(name),
+                                          data_prep.PICK_SHEET_SCHEMA)
+            for name in names}
+
+
+def main(players=12, weeks=15, latency=0.05, chunk_size=100, repeat=3):
+    sheets = player_sheets(players, weeks)
+    names = list(sheets)
+    with FakeSheetsServer(sheets, latency=latency) as server:
+        io = google_io.GoogleSheetsReadWrite(
+            spreadsheet_id='fake', creds=AnonymousCredentials(),
+            api_endpoint=server.url)
+
+        expected = read_serial(io, names)
+        start = len(server.requests)
+        frames = io.read_many(names, dtypes=data_prep.PICK_SHEET_SCHEMA,
+                              chunk_size=chunk_size)
+        requests = len(server.requests) - start
+        assert list(frames) == names
+        for name in names:
+            pd.testing.assert_frame_equal(frames[name], expected[name])
+        assert frames[names[0]]['Spread'].dtype == 'float32'
+
+        print(f'{players} sheets x {len(sheets[names[0]]) - 1} rows, '
+              f'{latency * 1000:.0f} ms latency; read_many used '
+              f'{requests} requests')
+        for name, func in [
+                ('read_many', lambda: io.read_many(
+                    names, dtypes=data_prep.PICK_SHEET_SCHEMA,
+                    chunk_size=chunk_size)),
+                ('serial', lambda: read_serial(io, names))]:
+            best = min(timeit.repeat(func, number=1, repeat=repeat))
+            print(f'  {name:>10}: best {best * 1000:9.1f} ms over '
+                  f'{repeat} runs')
+        io.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--players', type=int, default=12)
+    parser.add_argument('--weeks', type=int, default=15)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--chunk-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(players=args.players, weeks=args.weeks, latency=args.latency,
+         chunk_size=args.chunk_size, repeat=args.repeat)
@@ -0,0 +1,311 @@
+"""
+End-to-end benchmark of a weekly run, stage by stage, fully offline:
+scoreboards are fetched from a local ESPN stand-in serving the page saved
+in `documentation/raw_scrape.txt` for every week, and uploads go to a fake
+Sheets endpoint. Each scale (number of weeks pulled) reports the time and
+peak traced memory of every stage, plus a fingerprint of its output, and
+is compared against a stored baseline.
+
+Every week replays the same saved page, so the larger scales measure how
+the stages cope with the volume of a season or ten (number of requests,
+rows and uploads), not with the variety of real seasons' data.
+
+Stages: fetch (shared Fetcher), parse (payload extraction), extract
+(`game_fields` records), frame (typed game frames), prep
+(`data_prep.create_sheet_outputs`, ie. the picks view and game list),
+upload (`GoogleSheetsReadWrite.write_batch` of each week to every sheet,
+as a full `execution.update_google_sheet`) and sync
+(`GoogleSheetsReadWrite.sync` of each week, as an incremental one).
+Sync keys carry the week but not the year, so past one season the sync
+stage updates the rows of the same weeks rather than adding new ones.
+
+A stage regresses when its output fingerprint differs from the baseline,
+or its time or peak memory exceeds the baseline by more than the given
+tolerance. The exit status is 1 if any stage regressed.
+
+Usage: python benchmarks/bench_suite.py [--scales N,N,...] [--players N]
+       [--baseline PATH] [--save-baseline] [--time-tolerance X]
+       [--memory-tolerance X] [--json PATH]
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+
+from google.auth.credentials import AnonymousCredentials
+
+from fake_sheets import FakeSheetsServer
+from local_espn import WEEKS_PER_SEASON, LocalEspnServer
+from ff_app import data_prep, fetch, google_io
+from ff_app.scrape_espn import GetGameData, build_game_frame
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'baseline.json')
+
+# One week, one season and ten seasons
+DEFAULT_SCALES = (1, WEEKS_PER_SEASON, 10 * WEEKS_PER_SEASON)
+
+
+def week_years(n_weeks, last_year=2021):
+    """
+    (year, week) pairs of `n_weeks` regular season weeks, counting back
+    whole seasons from `last_year`
+    """
+    return [(last_year - i // WEEKS_PER_SEASON, i % WEEKS_PER_SEASON + 1)
+            for i in range(n_weeks)]
+
+
+def sheet_strings(df):
+    """
+    Sheet-ready string copy of a picks view or game list, as uploaded by
+    `execution.update_google_sheet`
+    """
+    df = df.copy()
+    df['Datetime'] = data_prep.format_datetime(df['Datetime'])
+    for col in df.columns:
+        df[col] = df[col].astype(object).fillna('').astype(str)
+    return df
+
+
+def serve(urls, stop):
+    """
+    Run the ESPN stand-in and the fake Sheets endpoint until `stop` is
+    set; run in a child process so their memory is not traced with the
+    stages'
+    """
+    with LocalEspnServer() as espn, FakeSheetsServer() as sheets:
+        urls.put((espn.url, sheets.url))
+        stop.wait()
+
+
+def frame_digest(frames):
+    digest = hashlib.sha1()
+    for df in frames:
+        digest.update(df.to_csv(index=False).encode())
+    return digest.hexdigest()[:16]
+
+
+class Stages():
+    """
+    The stages of a weekly run over many weeks, each consuming the output
+    of the one before
+
+    Parameters
+    ----------
+    espn_url : str
+        Root URL of the local ESPN stand-in
+
+    sheets_url : str
+        Root URL of the fake Sheets endpoint uploads are written to
+
+    players : list of str
+        Player sheets uploaded to, alongside 'Game List'
+    """
+    def __init__(self, espn_url, sheets_url, players):
+        self.espn_url = espn_url
+        self.players = players
+        self.io = google_io.GoogleSheetsReadWrite(
+            spreadsheet_id='bench', creds=AnonymousCredentials(),
+            api_endpoint=sheets_url)
+        # Build the Sheets service and values resource outside the stages
+        _ = self.io.sheet_values
+        self.uploads = 0
+
+    def sheet_names(self, stage):
+        """
+        Sheets of the stage's latest upload; each upload writes to new
+        sheets
+        """
+        return [f'{name} {stage} {self.uploads}'
+                for name in self.players + ['Game List']]
+
+    def fetch(self, pairs):
+        urls = [f'{self.espn_url}/scoreboard/{year}/{week}'
+                for year, week in pairs]
+        responses = fetch.fetch_many(urls)
+        return responses, sum(len(r.content) for r in responses)
+
+    def parse(self, responses):
+        pull = GetGameData(week_num=None, year=None)
+        payloads = [pull.parse_request_data(r) for r in responses]
+        return payloads, sum(
+            len(p['page']['content']['scoreboard']['evts']) for p in payloads)
+
+    def extract(self, payloads):
+        pull = GetGameData(week_num=None, year=None)
+        records = [pull.parse_games(p) for p in payloads]
+        return records, sum(len(r) for r in records)
+
+    def frame(self, records):
+        frames = [build_game_frame(r) for r in records]
+        return frames, sum(len(df) for df in frames)
+
+    def prep(self, frames, pairs):
+        outputs = [data_prep.create_sheet_outputs(df, week)
+                   for df, (_, week) in zip(frames, pairs)]
+        picks = [sheet_strings(p) for p, _ in outputs]
+        game_lists = [sheet_strings(g) for _, g in outputs]
+        return (picks, game_lists), '{} rows, {}'.format(
+            sum(len(df) for df in picks), frame_digest(picks + game_lists))
+
+    def _sheet_data(self, stage, picks_df, game_list):
+        *players, game_list_sheet = self.sheet_names(stage)
+        sheet_data = {player: picks_df for player in players}
+        sheet_data[game_list_sheet] = game_list
+        return sheet_data
+
+    def upload(self, prepared):
+        picks, game_lists = prepared
+        self.uploads += 1
+        for picks_df, game_list in zip(picks, game_lists):
+            self.io.write_batch(self._sheet_data('upload', picks_df,
+                                                 game_list))
+        return None, None
+
+    def sync(self, prepared):
+        picks, game_lists = prepared
+        self.uploads += 1
+        for picks_df, game_list in zip(picks, game_lists):
+            self.io.sync(self._sheet_data('sync', picks_df, game_list),
+                         key=data_prep.game_keys)
+        return None, None
+
+    def uploaded_cells(self, stage):
+        """
+        Number of cells in the sheets of the stage's latest upload, read
+        back from the Sheets endpoint
+        """
+        return sum(df.size + len(df.columns) for df in
+                   self.io.read_many(self.sheet_names(stage)).values())
+
+
+def measure(func, *args):
+    """
+    Run a stage twice: untraced for its time, then under tracemalloc for
+    its peak memory, so tracing overhead does not distort the timing
+    """
+    start = time.perf_counter()
+    result, fingerprint = func(*args)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {'seconds': round(seconds, 4),
+                    'peak_mb': round(peak / 2 ** 20, 2),
+                    'output': fingerprint}
+
+
+def run_scale(stages, n_weeks):
+    pairs = week_years(n_weeks)
+    report = {}
+    responses, report['fetch'] = measure(stages.fetch, pairs)
+    payloads, report['parse'] = measure(stages.parse, responses)
+    records, report['extract'] = measure(stages.extract, payloads)
+    frames, report['frame'] = measure(stages.frame, records)
+    prepared, report['prep'] = measure(stages.prep, frames, pairs)
+    _, report['upload'] = measure(stages.upload, prepared)
+    report['upload']['output'] = stages.uploaded_cells('upload')
+    _, report['sync'] = measure(stages.sync, prepared)
+    report['sync']['output'] = stages.uploaded_cells('sync')
+    return report
+
+
+def compare(results, baseline, time_tolerance, memory_tolerance):
+    """
+    Regressions of `results` against `baseline`, as readable strings
+    """
+    regressions = []
+    for scale, stages in results.items():
+        for stage, current in stages.items():
+            base = baseline.get(scale, {}).get(stage)
+            if base is None:
+                continue
+            name = f'{scale} weeks / {stage}'
+            if current['output'] != base['output']:
+                regressions.append(f"{name}: output {current['output']!r} "
+                                   f"!= baseline {base['output']!r}")
+            if current['seconds'] > base['seconds'] * (1 + time_tolerance):
+                regressions.append(f"{name}: {current['seconds']:.3f} s vs "
+                                   f"baseline {base['seconds']:.3f} s")
+            if current['peak_mb'] > base['peak_mb'] * (1 + memory_tolerance):
+                regressions.append(f"{name}: {current['peak_mb']:.1f} MB vs "
+                                   f"baseline {base['peak_mb']:.1f} MB")
+    return regressions
+
+
+def main(scales=DEFAULT_SCALES, players=3, baseline_path=BASELINE_PATH,
+         save_baseline=False, time_tolerance=0.5, memory_tolerance=0.2,
+         json_path=None):
+    fetcher = fetch.get_fetcher()
+    fetcher.cache = None
+    fetcher.limiter.min_interval = 0
+
+    urls, stop = multiprocessing.Queue(), multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(urls, stop),
+                                     daemon=True)
+    server.start()
+    espn_url, sheets_url = urls.get(timeout=30)
+    stages = Stages(espn_url, sheets_url,
+                    [f'player{i}' for i in range(players)])
+
+    results = {}
+    try:
+        for n_weeks in scales:
+            report = run_scale(stages, n_weeks)
+            results[str(n_weeks)] = report
+            print(f'{n_weeks} weeks')
+            for stage, r in report.items():
+                print(f"  {stage:>8}: {r['seconds'] * 1000:9.1f} ms "
+                      f"{r['peak_mb']:8.1f} MB peak   {r['output']}")
+    finally:
+        stages.io.close()
+        stop.set()
+        server.join()
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    if save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f'Saved baseline to {baseline_path}')
+        return 0
+    if not os.path.exists(baseline_path):
+        print(f'No baseline at {baseline_path}; run with --save-baseline')
+        return 0
+
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, time_tolerance,
+                          memory_tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if not regressions:
+        print('No regressions against the baseline')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--scales', default=','.join(
+        str(s) for s in DEFAULT_SCALES))
+    parser.add_argument('--players', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--time-tolerance', type=float, default=0.5)
+    parser.add_argument('--memory-tolerance', type=float, default=0.2)
+    parser.add_argument('--json', default=None)
+    args = parser.parse_args()
+    sys.exit(main(scales=[int(s) for s in args.scales.split(',')],
+                  players=args.players, baseline_path=args.baseline,
+                  save_baseline=args.save_baseline,
+                  time_tolerance=args.time_tolerance,
+                  memory_tolerance=args.memory_tolerance,
+                  json_path=args.json))
@@ -0,0 +1,185 @@
+"""
+Minimal in-memory stand-in for the Google Sheets v4 `values` API, served
+over local HTTP so `GoogleSheetsReadWrite` can be exercised offline by
+passing `api_endpoint=server.url`
+
+Supports `values.get`, `values.append`, `values.batchGet` and
+`values.batchUpdate` on ranges of the form 'Sheet!A1:J', 'Sheet!A:J' or
+'Sheet'.
+"""
+import json
+import re
+import string
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+A1_RE = re.compile(r'^([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?$')
+
+
+def column_index(letters):
+    index = 0
+    for c in letters:
+        index = index * 26 + string.ascii_uppercase.index(c) + 1
+    return index - 1
+
+
+def column_letters(index):
+    letters = ''
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = string.ascii_uppercase[rem] + letters
+    return letters
+
+
+def parse_range(range_name):
+    sheet, _, cells = unquote(range_name).rpartition('!')
+    if not sheet:
+        # A bare sheet name covers the whole sheet
+        return cells.strip("'"), 0, 0, 18277, None
+    start_col, start_row, end_col, end_row = A1_RE.match(cells).groups()
+    return (sheet.strip("'"),
+            column_index(start_col),
+            int(start_row) - 1 if start_row else 0,
+            column_index(end_col or start_col),
+            int(end_row) - 1 if end_row else None)
+
+
+class FakeSheetsServer():
+    """
+    Fake Sheets endpoint holding each sheet as a list of row lists
+
+    Parameters
+    ----------
+    sheets : dict (default None)
+        Initial sheet contents, keyed by sheet name
+
+    latency : float (default 0)
+        Seconds each request waits before it is answered, to stand in for
+        the round trip to Google
+    """
+    def __init__(self, sheets=None, host='127.0.0.1', port=0, latency=0):
+        self.latency = latency
+        self.sheets = {k: [list(r) for r in v]
+                       for k, v in (sheets or {}).items()}
+        self.requests = []
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def read_range(self, range_name):
+        sheet, c0, r0, c1, r1 = parse_range(range_name)
+        rows = self.sheets.get(sheet, [])
+        rows = rows[r0:None if r1 is None else r1 + 1]
+        values = [row[c0:c1 + 1] for row in rows]
+        while values and not any(v != '' for v in values[-1]):
+            values.pop()
+        return {'range': range_name, 'majorDimension': 'ROWS',
+                'values': values}
+
+    def write_range(self, range_name, values, start_row=None):
+        sheet, c0, r0, c1, _ = parse_range(range_name)
+        rows = self.sheets.setdefault(sheet, [])
+        r0 = r0 if start_row is None else start_row
+        for i, new_row in enumerate(values):
+            while len(rows) <= r0 + i:
+                rows.append([])
+            row = rows[r0 + i]
+            while len(row) < c0 + len(new_row):
+                row.append('')
+            for j, value in enumerate(new_row):
+                row[c0 + j] = '' if value is None else str(value)
+        n_cols = max([len(r) for r in values] or [0])
+        updated = '{}!{}{}:{}{}'.format(
+            sheet, column_letters(c0), r0 + 1,
+            column_letters(c0 + max(n_cols, 1) - 1), r0 + len(values))
+        return {'spreadsheetId': 'fake', 'updatedRange': updated,
+                'updatedRows': len(values), 'updatedColumns': n_cols,
+                'updatedCells': sum(len(r) for r in values)}
+
+    def append_range(self, range_name, values):
+        sheet = parse_range(range_name)[0]
+        start = len(self.sheets.get(sheet, []))
+        return {'updates': self.write_range(range_name, values, start)}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(length) or b'{}')
+
+            def _dispatch(self, method):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                path = url.path.split('/values', 1)[-1]
+                body = self._body() if method in ('POST', 'PUT') else {}
+                with server.lock:
+                    server.requests.append((method, self.path))
+                    if path == ':batchGet':
+                        return {'valueRanges': [server.read_range(r)
+                                                for r in query['ranges']]}
+                    if path == ':batchUpdate':
+                        responses = [server.write_range(d['range'],
+                                                        d['values'])
+                                     for d in body['data']]
+                        return {'responses': responses,
+                                'totalUpdatedCells': sum(
+                                    r['updatedCells'] for r in responses)}
+                    range_name, _, action = path.lstrip('/').partition(':')
+                    if action == 'append':
+                        return server.append_range(range_name,
+                                                   body['values'])
+                    if method == 'PUT':
+                        return server.write_range(range_name,
+                                                  body['values'])
+                    return server.read_range(unquote(range_name))
+
+            def do_GET(self):
+                time.sleep(server.latency)
+                self._reply(self._dispatch('GET'))
+
+            def do_POST(self):
+                time.sleep(server.latency)
+                self._reply(self._dispatch('POST'))
+
+            def do_PUT(self):
+                self._reply(self._dispatch('PUT'))
+
+        return Handler
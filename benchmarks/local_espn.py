@@ -0,0 +1,146 @@
+"""
+Local HTTP stand-in for ESPN that serves saved pages, so the scrapers and
+the fetch engine can be exercised offline
+
+Every path is answered with the scoreboard saved in
+`documentation/raw_scrape.txt` unless another page is registered for it.
+Responses carry an ETag and honour If-None-Match with a 304.
+`LocalEspnServer.patch_config()` points the configured scoreboard URLs at
+the server.
+
+The saved page's path, `SavedResponse` over it and `WEEKS_PER_SEASON` are
+shared with the other benchmarks from here.
+"""
+import hashlib
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ff_app.config import CONFIG
+
+
+RAW_SCRAPE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'documentation', 'raw_scrape.txt')
+
+WEEKS_PER_SEASON = 16
+
+
+class SavedResponse():
+    """
+    Stand-in for the response of a scoreboard request, holding the text
+    of a saved page
+    """
+    def __init__(self, path=RAW_SCRAPE_PATH):
+        with open(path, 'r') as f:
+            self.text = f.read()
+
+
+class LocalEspnServer():
+    """
+    Parameters
+    ----------
+    pages : dict (default None)
+        Page text keyed by request path; unregistered paths get the
+        default page
+
+    default_page : str (default None)
+        Text served for unregistered paths; defaults to the saved
+        scoreboard
+
+    fail_first : int (default 0)
+        Number of 503 responses returned for each path before it is
+        served, to exercise retries
+
+    delay : float (default 0)
+        Seconds to wait before answering each request, to simulate
+        network latency
+    """
+    def __init__(self, pages=None, default_page=None, fail_first=0,
+                 delay=0, host='127.0.0.1', port=0):
+        if default_page is None:
+            with open(RAW_SCRAPE_PATH, 'r') as f:
+                default_page = f.read()
+        self.pages = {k: v.encode() for k, v in (pages or {}).items()}
+        self.default_page = default_page.encode()
+        self.fail_first = fail_first
+        self.delay = delay
+        self.hits = Counter()
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._saved_urls = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever,
+                         daemon=True).start()
+        return self
+
+    def stop(self):
+        self.restore_config()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def patch_config(self):
+        self._saved_urls = dict(CONFIG['games']['url'])
+        CONFIG['games']['url'] = {
+            'bowls': self.url + '/scoreboard/{year}/bowls',
+            'inseason': self.url + '/scoreboard/{year}/{week}'
+        }
+        return self
+
+    def restore_config(self):
+        if self._saved_urls is not None:
+            CONFIG['games']['url'] = self._saved_urls
+            self._saved_urls = None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if server.delay:
+                    threading.Event().wait(server.delay)
+                with server.lock:
+                    server.hits[self.path] += 1
+                    failing = server.hits[self.path] <= server.fail_first
+                if failing:
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body = server.pages.get(self.path, server.default_page)
+                etag = '"{}"'.format(hashlib.md5(body).hexdigest())
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                with server.lock:
+                    server.bytes_sent += len(body)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
@@ -0,0 +1,337 @@
+"""
+On-disk cache of HTTP responses for ESPN pages. Bodies are stored gzip
+compressed and content-addressed by their SHA-256, with a small JSON
+entry per URL holding the validators (ETag / Last-Modified) and expiry.
+Total storage is capped, evicting the least recently used entries.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .config import CONFIG
+
+
+LOGGER = logging.getLogger(__file__)
+
+
+def ttl_for_games(completed, started=()):
+    """
+    Cache lifetime for a page covering games with the given status flags:
+    never expire once every game is complete, refresh quickly while any
+    game is in progress, and slowly otherwise
+
+    Parameters
+    ----------
+    completed : sequence of bool
+        Completed indicator for each game on the page
+
+    started : sequence of bool (default ())
+        Started indicator for each game on the page
+
+    Returns
+    -------
+    ttl : float or None
+        Lifetime in seconds, or None if the page should never expire
+    """
+    ttl = CONFIG.get('cache', {}).get('ttl', {})
+    completed = [bool(c) for c in completed]
+    if completed and all(completed):
+        return None
+    if any(bool(s) and not c for s, c in zip(started, completed)):
+        return ttl.get('live', 60)
+    return ttl.get('upcoming', 1800)
+
+
+class CachedPage():
+    """
+    Cached response body and metadata for a single URL
+    """
+    def __init__(self, url, content, entry):
+        self.url = url
+        self.content = content
+        self.entry = entry
+
+    @property
+    def fresh(self):
+        expires_at = self.entry.get('expires_at')
+        return expires_at is None or expires_at > time.time()
+
+    def response(self):
+        """
+        requests.Response rebuilt from the cached body
+        """
+        r = requests.Response()
+        r._content = self.content
+        r.status_code = 200
+        r.url = self.url
+        r.encoding = self.entry.get('encoding')
+        r.headers = CaseInsensitiveDict(
+            {k: v for k, v in [('Content-Type', self.entry.get('content_type')),
+                               ('ETag', self.entry.get('etag')),
+                               ('Last-Modified', self.entry.get('last_modified'))]
+             if v})
+        r.from_cache = True
+        return r
+
+    @property
+    def validators(self):
+        headers = {}
+        if self.entry.get('etag'):
+            headers['If-None-Match'] = self.entry['etag']
+        if self.entry.get('last_modified'):
+            headers['If-Modified-Since'] = self.entry['last_modified']
+        return headers
+
+
+class ResponseCache():
+    """
+    Parameters
+    ----------
+    cache_dir : str
+        Directory holding the cache; created if it does not exist
+
+    max_bytes : int (default 500MB)
+        Cap on the total compressed size of cached bodies
+
+    default_ttl : float (default 3600)
+        Lifetime in seconds of newly stored responses
+    """
+    def __init__(self, cache_dir, max_bytes=500 * 2 ** 20, default_ttl=3600):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._lock = threading.RLock()
+        self._size = None
+        self._refs = None
+        os.makedirs(os.path.join(self.cache_dir, 'entries'), exist_ok=True)
+        os.makedirs(os.path.join(self.cache_dir, 'blobs'), exist_ok=True)
+
+    @classmethod
+    def from_config(cls):
+        """
+        Cache configured by the `cache` section of the config, stored under
+        the `output` directory unless `cache.dir` is set. Returns None if
+        caching is disabled.
+        """
+        settings = CONFIG.get('cache', {})
+        if not settings.get('enabled', True):
+            return None
+        cache_dir = settings.get('dir') \
+            or os.path.join(os.path.expanduser(CONFIG['output']), 'http_cache')
+        return cls(cache_dir,
+                   max_bytes=int(settings.get('max_mb', 500) * 2 ** 20),
+                   default_ttl=settings.get('ttl', {}).get('default', 3600))
+
+    def _entry_path(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.cache_dir, 'entries', f'{key}.json')
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, 'blobs', f'{digest}.gz')
+
+    def _write_json(self, path, data):
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def get(self, url):
+        """
+        Cached page for the URL, fresh or stale, or None if not cached
+        """
+        path = self._entry_path(url)
+        with self._lock:
+            try:
+                with open(path, 'r') as f:
+                    entry = json.load(f)
+                with gzip.open(self._blob_path(entry['digest']), 'rb') as f:
+                    content = f.read()
+            except (OSError, ValueError, KeyError):
+                return None
+            # Entry mtime tracks last use for LRU eviction
+            os.utime(path)
+        return CachedPage(url, content, entry)
+
+    def put(self, url, response, ttl=None):
+        """
+        Store a response body with its validators
+
+        Parameters
+        ----------
+        url : str
+            URL the response was fetched from
+
+        response : requests.Response
+            Successful response to cache
+
+        ttl : float (default None)
+            Lifetime in seconds; defaults to `default_ttl`. A `ttl` of 0
+            stores the page already stale, so it is always revalidated
+        """
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        entry = {
+            'url': url,
+            'digest': digest,
+            'encoding': response.encoding,
+            'content_type': response.headers.get('Content-Type'),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+            'expires_at': time.time() + (self.default_ttl if ttl is None
+                                         else ttl)
+        }
+        with self._lock:
+            # Counted before the new entry is written, so it is not
+            # counted twice
+            refs = self._refcounts()
+            entry_path = self._entry_path(url)
+            try:
+                with open(entry_path, 'r') as f:
+                    old_digest = json.load(f).get('digest')
+            except (OSError, ValueError):
+                old_digest = None
+            blob = self._blob_path(digest)
+            if not os.path.exists(blob):
+                tmp = f'{blob}.{threading.get_ident()}.tmp'
+                with gzip.open(tmp, 'wb', compresslevel=6) as f:
+                    f.write(content)
+                os.replace(tmp, blob)
+                if self._size is not None:
+                    self._size += os.path.getsize(blob)
+            self._write_json(entry_path, entry)
+            if old_digest != digest:
+                refs[digest] = refs.get(digest, 0) + 1
+                if old_digest is not None:
+                    self._release(old_digest)
+            self._evict()
+
+    def touch(self, url):
+        """
+        Mark a cached page as revalidated (eg. after a 304 response),
+        restarting its lifetime
+        """
+        with self._lock:
+            page = self.get(url)
+            if page is None:
+                return
+            now = time.time()
+            expires_at = page.entry.get('expires_at')
+            if expires_at is not None:
+                expires_at = now + expires_at - page.entry['fetched_at']
+            self._update(url, fetched_at=now, expires_at=expires_at)
+
+    def set_ttl(self, url, ttl):
+        """
+        Change the lifetime of a cached page, counted from when it was
+        fetched; a `ttl` of None keeps it forever
+        """
+        with self._lock:
+            page = self.get(url)
+            if page is None:
+                return
+            fetched_at = page.entry.get('fetched_at', time.time())
+            self._update(url, expires_at=None if ttl is None
+                         else fetched_at + ttl)
+
+    def _update(self, url, **fields):
+        with self._lock:
+            page = self.get(url)
+            if page is None:
+                return
+            page.entry.update(fields)
+            self._write_json(self._entry_path(url), page.entry)
+
+    @property
+    def size(self):
+        with self._lock:
+            if self._size is None:
+                blob_dir = os.path.join(self.cache_dir, 'blobs')
+                self._size = sum(
+                    os.path.getsize(os.path.join(blob_dir, name))
+                    for name in os.listdir(blob_dir))
+            return self._size
+
+    def _entry_digests(self):
+        """
+        (last used, path, digest) of every entry, and the number of
+        entries referencing each body digest
+        """
+        entry_dir = os.path.join(self.cache_dir, 'entries')
+        entries = []
+        refs = {}
+        for name in os.listdir(entry_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(entry_dir, name)
+            try:
+                with open(path, 'r') as f:
+                    digest = json.load(f)['digest']
+                entries.append((os.path.getmtime(path), path, digest))
+            except (OSError, ValueError, KeyError):
+                continue
+            refs[digest] = refs.get(digest, 0) + 1
+        return entries, refs
+
+    def _refcounts(self):
+        """
+        Number of entries referencing each body digest, counted from the
+        entries on first use and kept up to date by `put` and `_evict`
+        """
+        if self._refs is None:
+            self._refs = self._entry_digests()[1]
+        return self._refs
+
+    def _release(self, digest):
+        """
+        Drop one reference to a body, removing it once nothing uses it
+        """
+        refs = self._refcounts()
+        refs[digest] = refs.get(digest, 0) - 1
+        if refs[digest] <= 0:
+            del refs[digest]
+            self._remove_blob(digest)
+
+    def _remove_blob(self, digest):
+        blob = self._blob_path(digest)
+        try:
+            size = os.path.getsize(blob)
+            os.remove(blob)
+        except OSError:
+            return
+        if self._size is not None:
+            self._size -= size
+
+    def _evict(self):
+        """
+        Drop bodies no longer referenced by any entry, then least recently
+        used entries, until the cache fits within `max_bytes`
+        """
+        if self.size <= self.max_bytes:
+            return
+        entries, refs = self._entry_digests()
+        self._refs = refs
+
+        blob_dir = os.path.join(self.cache_dir, 'blobs')
+        orphans = [name[:-len('.gz')] for name in os.listdir(blob_dir)
+                   if name.endswith('.gz') and name[:-len('.gz')] not in refs]
+        for digest in orphans:
+            self._remove_blob(digest)
+
+        evicted = 0
+        for _, path, digest in sorted(entries):
+            if self._size <= self.max_bytes:
+                break
+            os.remove(path)
+            evicted += 1
+            self._release(digest)
+        LOGGER.info("Removed %s unreferenced bodies and evicted %s cached "
+                    "pages; cache is now %s bytes",
+                    len(orphans), evicted, self._size)
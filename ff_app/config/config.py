@@ -1,12 +1,12 @@
 """
 """
 
-import yaml
-import inspect
+from collections.abc import MutableMapping
 import os
 import ff_app
 
 def load_config(config_path=None):
+    import yaml
     config_path = config_path \
         or os.path.join(os.path.dirname(ff_app.__file__),
                         'config', 'config.yaml')
@@ -14,4 +14,44 @@ def load_config(config_path=None):
         config = yaml.safe_load(f)
     return config
 
-CONFIG = load_config()
+
+class LazyConfig(MutableMapping):
+    """
+    Mapping over the YAML config that is only read from disk the first
+    time a setting is accessed, so importing the package stays cheap
+
+    Parameters
+    ----------
+    config_path : str (default None)
+        Path to the YAML config; defaults to the packaged config.yaml
+    """
+    def __init__(self, config_path=None):
+        self._config_path = config_path
+        self._config = None
+
+    @property
+    def config(self):
+        if self._config is None:
+            self._config = load_config(self._config_path)
+        return self._config
+
+    def __getitem__(self, key):
+        return self.config[key]
+
+    def __setitem__(self, key, value):
+        self.config[key] = value
+
+    def __delitem__(self, key):
+        del self.config[key]
+
+    def __iter__(self):
+        return iter(self.config)
+
+    def __len__(self):
+        return len(self.config)
+
+    def __repr__(self):
+        return repr(self.config)
+
+
+CONFIG = LazyConfig()
@@ -6,14 +6,21 @@ import pandas as pd
 import numpy as np
 import logging
 
-from datetime import datetime
+from .team_aliases import SEED_ALIASES, TeamAliasIndex
 
-from . import google_io
 
 LOGGER = logging.getLogger(__file__)
 
+DATETIME_FORMAT = '%m/%d %I:%M %p (%a)'
 
-def pick_sheet_summary(game_data):
+# dtypes of the numeric picks view columns read back from a player's sheet;
+# 'Week' stays a string as it may be 'bowls'
+PICK_SHEET_SCHEMA = {
+    'Spread': 'float32',
+    'Total': 'float32',
+}
+
+def pick_sheet_summary(game_data, aliases=None, favorites=None):
     """
     Produce a short dataframe of game data for upload to individual
     group members' sheets. This view contains the columns for the
@@ -26,20 +33,66 @@ def pick_sheet_summary(game_data):
     game_data : pandas.DataFrame
         Dataframe containing the full game data for a single week of
         games as scraped from ESPN
+
+    aliases : TeamAliasIndex (default None)
+        Index resolving the odds favorite to the home or away team;
+        defaults to an in-memory index of the seed aliases
+
+    favorites : numpy.ndarray (default None)
+        Favorite of each game already resolved by
+        `TeamAliasIndex.resolve_favorites`; resolved with `aliases` if None
     
     Returns
     -------
     short_df : pandas.DataFrame
         Dataframe containing the individual picks view of game data
     """
-    short_df = pd.DataFrame.from_records(
-        columns=['Week', 'Datetime', 'Mandatory', 'Favorite', 'Location',
-                 'Underdog', 'Spread', 'Total', 'Implied Score'],
-        data=game_data.apply(get_short_data, axis=1))
-    short_df = short_df[
-        ['Week', 'Datetime', 'Mandatory', 'Favorite', 'Location',
-         'Underdog', 'Spread', 'Total', 'Implied Score']
-    ]
+    fav = favorites
+    if fav is None:
+        fav = (aliases or TeamAliasIndex()).resolve_favorites(game_data)
+    home = game_data['home_abbr'].astype(object).to_numpy()
+    away = game_data['away_abbr'].astype(object).to_numpy()
+
+    is_even = fav == 'EVEN'
+    is_home = is_even | (fav == home)
+    is_away = ~is_home & (fav == away)
+    unmatched = ~(is_home | is_away)
+    if unmatched.any():
+        raise ValueError(game_data[unmatched])
+
+    favorite = np.where(is_home, home, away)
+    underdog = np.where(is_home, away, home)
+    location = np.where(is_home, 'vs', '@')
+    spread = np.where(is_even, 0.,
+                      pd.to_numeric(game_data['odds_line_spread']))
+    total = pd.to_numeric(game_data['odds_ou']).to_numpy(dtype=float)
+
+    has_total = ~np.isnan(total)
+    if np.isnan(spread[has_total]).any():
+        raise ValueError(game_data[has_total & np.isnan(spread)])
+    score = calc_implied_score(spread[has_total], total[has_total])
+    implied_score = np.full(len(game_data), '', dtype=object)
+    implied_score[has_total] = (
+        pd.Series(favorite[has_total], dtype=str) + ' '
+        + pd.Series(score['fav_score'], dtype=str) + ' - '
+        + pd.Series(underdog[has_total], dtype=str) + ' '
+        + pd.Series(score['dog_score'], dtype=str)
+    ).to_numpy()
+
+    mandatory = np.where(game_data['home_rank'].notna().to_numpy()
+                         & game_data['away_rank'].notna().to_numpy(), 'Y', '')
+
+    short_df = pd.DataFrame({
+        'Week': game_data['Week'].to_numpy(),
+        'Datetime': game_data['Datetime'].to_numpy(),
+        'Mandatory': mandatory,
+        'Favorite': favorite,
+        'Location': location,
+        'Underdog': underdog,
+        'Spread': spread,
+        'Total': total,
+        'Implied Score': implied_score
+    })
     short_df['Total'] = short_df['Total'].fillna('')
     return short_df
 
@@ -103,20 +156,48 @@ def master_sheet_summary(full_df, short_df):
     return combined_df
 
 
-def create_sheet_outputs(game_data, week_num):
+def create_sheet_outputs(game_data, week_num, aliases=None):
     """
-    
+    Build the picks view and game list for the games with odds. Games
+    whose odds favorite matches neither team, even after alias
+    resolution, are logged and left out rather than failing the week.
+
+    Parameters
+    ----------
+    game_data : pandas.DataFrame
+        Dataframe containing the full game data for a single week
+
+    week_num : int
+        Week number the games belong to
+
+    aliases : TeamAliasIndex (default None)
+        Index resolving odds favorites; it learns the week's teams and
+        any new aliases. Defaults to an in-memory index of the seed
+        aliases
+
+    Returns
+    -------
+    pick_sheet_df : pandas.DataFrame
+        Picks view for the individual pickem sheets
+
+    master_sheet_df : pandas.DataFrame
+        Full game list for the 'Game List' sheet
     """
-    full_df = game_data[game_data['has_odds']].copy()
+    aliases = aliases or TeamAliasIndex()
+    aliases.learn_frame(game_data)
+    full_df = game_data[game_data['has_odds'].fillna(False).astype(bool)].copy()
+    favorites = aliases.resolve_favorites(full_df)
+    unresolved = pd.isna(favorites)
+    if unresolved.any():
+        LOGGER.warning("Skipping %s games whose odds favorite matches "
+                       "neither team: %s", unresolved.sum(),
+                       full_df.loc[unresolved, 'odds_line'].tolist())
+        full_df = full_df[~unresolved]
+        favorites = favorites[~unresolved]
     full_df['Week'] = week_num
-    full_df['Datetime'] = full_df.apply(
-        lambda x: datetime.combine(x['date'],
-                                   datetime.strptime(x['time'],
-                                   '%I:%M %p %Z').time()
-                                  ).strftime('%m/%d %I:%M %p (%a)'),
-        axis=1)
+    full_df['Datetime'] = full_df['kickoff']
     full_df.reset_index(drop=True, inplace=True)
-    pick_sheet_df = pick_sheet_summary(full_df)
+    pick_sheet_df = pick_sheet_summary(full_df, aliases, favorites=favorites)
     master_sheet_df = master_sheet_summary(full_df, pick_sheet_df)
 
     # pick_sheet_df.sort_values(by='Datetime', inplace=True)
@@ -126,11 +207,60 @@ def create_sheet_outputs(game_data, week_num):
 
 
 
+def game_keys(df):
+    """
+    Key identifying each game by week and home/away team abbreviation,
+    for either the picks view or the game list layout. Used to match rows
+    when syncing to the Google sheets.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Picks view or game list data, as produced by `create_sheet_outputs`
+        or read back from the sheets
+
+    Returns
+    -------
+    keys : pandas.Series
+        Keys of the form '<week>|<home abbr>|<away abbr>'
+    """
+    if 'Home Abbr' in df.columns:
+        home, away = df['Home Abbr'], df['Away Abbr']
+    else:
+        is_home = df['Location'] == 'vs'
+        home = df['Favorite'].where(is_home, df['Underdog'])
+        away = df['Underdog'].where(is_home, df['Favorite'])
+    return df['Week'].astype(str) + '|' + home.astype(str) \
+        + '|' + away.astype(str)
+
+
+def format_datetime(datetime_col):
+    """
+    Format a column of kickoff datetimes for display in the pick em
+    sheets, eg. '11/25 07:30 PM (Thu)'
+
+    Parameters
+    ----------
+    datetime_col : pandas.Series
+        Timezone-aware datetime column, such as 'Datetime'
+
+    Returns
+    -------
+    formatted : pandas.Series
+        Column of formatted strings, with missing kickoffs left as NaN
+    """
+    return datetime_col.dt.strftime(DATETIME_FORMAT)
+
+
 def calc_implied_score(spread, total):
-    baseline = total / 2
-    adj = (spread / 2) * -1
-    return {'fav_score': int(baseline + adj),
-            'dog_score': int(baseline - adj)}
+    """
+    Implied final score of the favorite and underdog from the spread and
+    total. Accepts scalars or NumPy arrays of matching shape.
+    """
+    baseline = np.divide(total, 2)
+    adj = np.divide(spread, 2) * -1
+    return {'fav_score': np.trunc(baseline + adj).astype(int),
+            'dog_score': np.trunc(baseline - adj).astype(int)}
 
 
 def implied_score_string(favorite, underdog, spread, total):
@@ -141,21 +271,12 @@ def implied_score_string(favorite, underdog, spread, total):
 
 
 def get_short_data(row):
-
-    # Cleanup for when the odds favorite is formatted differently from the
-    # home or away team abbreviations
-    line_team_cleanup = {
-        'COASTALCAR': 'CCU',    # Observed 2022 Week 1
-        'KANSASST': 'KSU',      # 2022 Week 2
-        'MICHIGANST': 'MSU',
-        'ULLAFAYTTE': 'UL',
-        'OKLAST': 'OKST',
-        'OREGONST': 'ORST',
-        'MISSSTATE': 'MSST',
-        'GATECH': 'GT'
-    }
+    """
+    Row-wise equivalent of `pick_sheet_summary`, returning the picks view
+    fields for a single game
+    """
     row['odds_line_fav'] = \
-        line_team_cleanup.get(row['odds_line_fav'], row['odds_line_fav'])
+        SEED_ALIASES.get(row['odds_line_fav'], row['odds_line_fav'])
 
     if row['odds_line_fav'] == 'EVEN':
         favorite = row['home_abbr']
@@ -175,7 +296,7 @@ def get_short_data(row):
     else:
         raise ValueError(row)
     
-    if not np.isnan(row['odds_ou']):
+    if pd.notna(row['odds_ou']):
         try:
             total = row['odds_ou']
             implied_score = implied_score_string(favorite, underdog, spread, total)
@@ -185,7 +306,7 @@ def get_short_data(row):
         total = np.nan
         implied_score = ''
 
-    if not np.isnan(row['home_rank']) and not np.isnan(row['away_rank']):
+    if pd.notna(row['home_rank']) and pd.notna(row['away_rank']):
         mandatory = 'Y'
     else:
         mandatory = ''
@@ -4,14 +4,16 @@ import os
 import sys
 import logging
 
-from . import scrape_espn, data_prep, google_io
+from . import scrape_espn
 from .config import CONFIG
+from .metrics import METRICS
 
 
 LOGGER = logging.getLogger(__file__)
 
 
-def run_data_pull(week, year=None, output_dir=None, return_all_games=False):
+def run_data_pull(week, year=None, output_dir=None, return_all_games=False,
+                  output_formats=None, store_dir=None):
     """
     Execute data pull from ESPN and create data frames for game views
 
@@ -31,6 +33,16 @@ def run_data_pull(week, year=None, output_dir=None, return_all_games=False):
         only games with spreads will be returned; otherwise, if True,
         all games will be returned regardless of spread
 
+    output_formats : list (default None)
+        Formats the week's data is saved in: 'parquet' appends the games,
+        picks view and game list to the season store, and 'csv' exports
+        the game list CSV as an export. Defaults to `output_formats` in
+        the config, or the season store alone
+
+    store_dir : str (default None)
+        Root directory of the season store; defaults to 'store' under the
+        configured output directory
+
     Returns
     -------
     picks_view : pandas.DataFrame
@@ -50,20 +62,50 @@ def run_data_pull(week, year=None, output_dir=None, return_all_games=False):
     output_dir = output_dir \
         or os.path.join(os.path.expanduser(CONFIG['output']), str(year))
     
+    # pandas and the game frame helpers load with the first pull
+    from . import data_prep, team_aliases
     pull = scrape_espn.GetGameData(week_num=week, year=year)
-    games = pull.game_data_df
+    pull.refresh()
+    with METRICS.span('frame'):
+        games = pull.game_data_df
+    METRICS.incr('games_pulled', len(games))
     LOGGER.info("Pulled %s total games for week %s in %s",
                 len(games), week, year)
     LOGGER.info("%s games have odds available",
-                sum(games['has_odds']))
+                games['has_odds'].sum())
 
-    picks_view, full_data = data_prep.create_sheet_outputs(games, week)
+    with METRICS.span('prep'):
+        aliases = team_aliases.TeamAliasIndex.from_config()
+        picks_view, full_data = data_prep.create_sheet_outputs(
+            games, week, aliases=aliases)
+        aliases.save()
     LOGGER.info("Picks sheet data has shape %s", picks_view.shape)
     LOGGER.info("Game list data has shape %s", full_data.shape)
 
-    output_path = os.path.join(output_dir, f'week{week}.csv')
-    LOGGER.info("Saving game data to disk at '%s'", output_path)
-    full_data.to_csv(output_path, index=False)
+    formats = list(output_formats or CONFIG.get('output_formats',
+                                                ['parquet']))
+    if 'parquet' in formats:
+        # pyarrow is only loaded for runs that write to the season store
+        try:
+            from . import season_store
+        except ImportError:
+            LOGGER.warning("pyarrow is not installed; saving the game list "
+                           "as CSV instead of to the season store")
+            formats.append('csv')
+        else:
+            store = season_store.SeasonStore(store_dir)
+            LOGGER.info("Saving game data to the season store at '%s'",
+                        store.root)
+            with METRICS.span('store_write'):
+                store.append_week('games', games, year, week)
+                store.append_week('picks', picks_view, year, week)
+                store.append_week('game_list', full_data, year, week)
+
+    if 'csv' in formats:
+        output_path = os.path.join(output_dir, f'week{week}.csv')
+        LOGGER.info("Saving game data to disk at '%s'", output_path)
+        with METRICS.span('csv_write'):
+            full_data.to_csv(output_path, index=False)
 
     if return_all_games:
         return picks_view, full_data, games
@@ -71,7 +113,8 @@ def run_data_pull(week, year=None, output_dir=None, return_all_games=False):
         return picks_view, full_data
 
 
-def update_google_sheet(picks_view, full_data, player_list=None):
+def update_google_sheet(picks_view, full_data, player_list=None,
+                        incremental=False):
     """
     Performs the API call to Google Sheets for uploading the games data
     to the main game data sheet and each individual player's pickem sheet
@@ -90,35 +133,117 @@ def update_google_sheet(picks_view, full_data, player_list=None):
         List of players making picks; this should correspond directly to
         the names of the individual sheets where pickem views are uploaded
 
+    incremental : bool (default False)
+        Indicator for whether to sync only changed cells and new games,
+        matched on week and home/away team, instead of appending every
+        row. Incremental syncs are safe to rerun for the same week
+
     Returns
     -------
     None
     """
+    # The Google API stack is only loaded for runs that upload
+    from . import data_prep, google_io
     io = google_io.GoogleSheetsReadWrite()
 
-    picks_df = picks_view.copy()
-    for col in picks_df.columns:
-        picks_df[col] = picks_df[col].fillna('').astype(str)
+    with METRICS.span('sheets_format'):
+        picks_df = picks_view.copy()
+        picks_df['Datetime'] = data_prep.format_datetime(picks_df['Datetime'])
+        for col in picks_df.columns:
+            picks_df[col] = picks_df[col].astype(object).fillna('') \
+                .astype(str)
 
-    full_df = full_data.copy()
-    for col in full_df.columns:
-        full_df[col] = full_df[col].fillna('').astype(str)
+        full_df = full_data.copy()
+        full_df['Datetime'] = data_prep.format_datetime(full_df['Datetime'])
+        for col in full_df.columns:
+            full_df[col] = full_df[col].astype(object).fillna('').astype(str)
 
     players = player_list or CONFIG['player_list']
-    for p in players:
-        LOGGER.info("Writing data for %s", p)
-        io.write(p, picks_df)
+    sheet_data = {p: picks_df for p in players}
+    sheet_data['Game List'] = full_df
+
+    LOGGER.info("Writing data for %s players and the game list",
+                len(players))
+    with METRICS.span('sheets_upload'):
+        if incremental:
+            io.sync(sheet_data, key=data_prep.game_keys)
+        else:
+            io.write_batch(sheet_data)
+
+
+def update_standings(picks_view, games, week, year=None, player_list=None,
+                     sheets_io=None):
+    """
+    Apply the week's newly final games, score corrections and pick edits
+    to the persisted season standings. Player picks are only read from
+    the sheets once a game of the week is final; the standings are left
+    as they are if no sheet has a pick column yet.
+
+    Parameters
+    ----------
+    picks_view : pandas.DataFrame
+        Picks view of the week's games, as from `run_data_pull`
+
+    games : pandas.DataFrame
+        All of the week's scraped games, as from `run_data_pull` with
+        `return_all_games`
+
+    week : int
+        Week number within the season
+
+    year : int (default None)
+        Year for the current season
 
-    LOGGER.info("Writing out game list")
-    io.write('Game List', full_df)
+    player_list : list (default None)
+        Players whose picks are graded; defaults to the configured list
+
+    sheets_io : google_io.GoogleSheetsReadWrite (default None)
+        Client the picks are read with; a new one is created if needed
+
+    Returns
+    -------
+    leaderboard : pandas.DataFrame
+        Season record of each player, best record first
+    """
+    from . import standings
+    store = standings.StandingsStore.from_config(year)
+    results = games.assign(Week=str(week))
+    # Picks are only read when some game went final or is already graded,
+    # as picks of graded games may have been edited since
+    if store.changed_games(picks_view, results).any() \
+            or store.graded_games(picks_view).any():
+        from . import google_io, grading
+        sheets_io = sheets_io or google_io.GoogleSheetsReadWrite()
+        with METRICS.span('sheets_read_picks'):
+            player_picks = grading.read_player_picks(sheets_io, player_list)
+        if not player_picks:
+            LOGGER.warning("No player picks to grade; standings not updated")
+            return store.leaderboard()
+        with METRICS.span('standings'):
+            store.update(picks_view, results, player_picks)
+            store.save()
+    return store.leaderboard()
 
 
 if __name__ == '__main__':
     assert len(sys.argv) > 1, 'No week number provided'
     week_num = sys.argv[1]
+    # Standings are graded only if enabled in the config or with --standings
+    grade_standings = '--standings' in sys.argv[2:] \
+        or (CONFIG.get('standings') or {}).get('enabled', False)
 
     LOGGER.info("Executing data pull and upload for week %s", week_num)
-    short_df, combined_df = run_data_pull(week=week_num)
-    update_google_sheet(short_df, combined_df)
+    # Metrics are written for failed runs too, as those are often the ones
+    # worth looking at
+    try:
+        with METRICS.profile(f'week{week_num}'), METRICS.span('total'):
+            short_df, combined_df, all_games = run_data_pull(
+                week=week_num, return_all_games=True)
+            update_google_sheet(short_df, combined_df)
+            if grade_standings:
+                LOGGER.info("Standings:\n%s",
+                            update_standings(short_df, all_games, week_num))
+    finally:
+        METRICS.dump()
     LOGGER.info("Execution complete")
 
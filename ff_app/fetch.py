@@ -0,0 +1,261 @@
+"""
+Shared fetch engine for ESPN pages. Requests run on an asyncio event loop
+over one pooled, keep-alive `requests` session, with bounded concurrency,
+per-host rate limiting, timeouts, exponential-backoff retries and an
+optional on-disk response cache. The scrapers use it through the
+synchronous `Fetcher.get` / `get_many`.
+"""
+import asyncio
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import ResponseCache
+from .config import CONFIG
+from .metrics import METRICS
+
+
+LOGGER = logging.getLogger(__file__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter():
+    """
+    Spaces out requests to the same host by at least `min_interval`
+    seconds, across all threads and tasks sharing the limiter
+
+    Parameters
+    ----------
+    min_interval : float
+        Minimum number of seconds between the starts of two requests
+        to the same host
+    """
+    def __init__(self, min_interval=0.25):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, url):
+        """
+        Reserve the next request slot for the URL's host and return the
+        number of seconds to wait for it
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        return slot - now
+
+    def wait(self, url):
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url):
+        delay = self.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def pooled_session(pool_size=8):
+    """
+    requests session whose connection pool can hold `pool_size`
+    keep-alive connections per host
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class Fetcher():
+    """
+    Asyncio fetch engine sharing one pooled session between all requests
+
+    Parameters
+    ----------
+    max_concurrency : int (default 8)
+        Maximum number of requests in flight at once
+
+    timeout : float (default 30)
+        Timeout in seconds for each request attempt
+
+    retries : int (default 3)
+        Number of times a failed request is retried; connection errors,
+        timeouts and 429/5xx responses are retried
+
+    backoff : float (default 0.5)
+        Delay in seconds before the first retry, doubled for each retry
+        after that
+
+    min_interval : float (default 0.25)
+        Minimum number of seconds between requests to the same host
+
+    cache : ResponseCache (default None)
+        On-disk cache read through for every GET; fresh pages are served
+        without a request and stale ones are revalidated with their
+        ETag / Last-Modified
+    """
+    def __init__(self, max_concurrency=8, timeout=30, retries=3,
+                 backoff=0.5, min_interval=0.25, cache=None):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = HostRateLimiter(min_interval)
+        self.cache = cache
+        self.session = pooled_session(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                            thread_name_prefix='fetch')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    async def get_async(self, url, semaphore=None, revalidate=False):
+        """
+        GET a single URL, retrying transient failures with exponential
+        backoff. Raises `requests.HTTPError` for an error status that
+        persists after the retries.
+
+        With a cache, a fresh cached page is returned without a request
+        unless `revalidate` is True, and a stale one is only re-downloaded
+        if the server reports it changed.
+        """
+        page = self.cache.get(url) if self.cache else None
+        if page is not None and page.fresh and not revalidate:
+            LOGGER.debug("Serving %s from cache", url)
+            METRICS.incr('http_cache_hits')
+            return page.response()
+        headers = page.validators if page is not None else {}
+
+        loop = asyncio.get_running_loop()
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrency)
+        for attempt in range(self.retries + 1):
+            async with semaphore:
+                await self.limiter.wait_async(url)
+                LOGGER.debug("Making GET request for %s", url)
+                METRICS.incr('http_requests')
+                try:
+                    r = await loop.run_in_executor(
+                        self._executor,
+                        partial(self.session.get, url, headers=headers,
+                                timeout=self.timeout))
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if attempt == self.retries:
+                        raise
+                    LOGGER.warning("GET %s failed (%s); retrying", url, e)
+                    METRICS.incr('http_retries')
+                else:
+                    if r.status_code == 304 and page is not None:
+                        METRICS.incr('http_not_modified')
+                        self.cache.touch(url)
+                        return page.response()
+                    if r.status_code not in RETRY_STATUSES \
+                            or attempt == self.retries:
+                        r.raise_for_status()
+                        METRICS.incr('http_bytes', len(r.content))
+                        if self.cache:
+                            self.cache.put(url, r)
+                        return r
+                    LOGGER.warning("GET %s returned %s; retrying",
+                                   url, r.status_code)
+                    METRICS.incr('http_retries')
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def get_many_async(self, urls, max_concurrency=None,
+                             return_exceptions=False):
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        return await asyncio.gather(
+            *[self.get_async(url, semaphore) for url in urls],
+            return_exceptions=return_exceptions)
+
+    def get(self, url, revalidate=False):
+        """
+        Synchronous GET of a single URL
+        """
+        return self._run(self.get_async(url, revalidate=revalidate))
+
+    def set_ttl(self, url, ttl):
+        """
+        Set the cache lifetime of a fetched page, eg. from
+        `cache.ttl_for_games`; None keeps it forever
+        """
+        if self.cache:
+            self.cache.set_ttl(url, ttl)
+
+    def get_many(self, urls, max_concurrency=None, return_exceptions=False):
+        """
+        Synchronous concurrent GET of a list of URLs
+
+        Parameters
+        ----------
+        urls : list of str
+            URLs to fetch
+
+        max_concurrency : int (default None)
+            Maximum number of these requests in flight at once; limited
+            to the fetcher's own `max_concurrency`
+
+        return_exceptions : bool (default False)
+            Indicator for whether a failed request's exception is returned
+            in its place instead of being raised
+
+        Returns
+        -------
+        responses : list of requests.Response
+            Responses in the same order as `urls`
+        """
+        return self._run(self.get_many_async(urls, max_concurrency,
+                                             return_exceptions))
+
+    def _run(self, coro):
+        """
+        Run a coroutine to completion, from a separate thread if this
+        thread already has a running event loop (eg. inside a notebook)
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, coro).result()
+
+
+_FETCHER = None
+_FETCHER_LOCK = threading.Lock()
+
+
+def get_fetcher():
+    """
+    Process-wide Fetcher built from the `fetch` section of the config
+    """
+    global _FETCHER
+    with _FETCHER_LOCK:
+        if _FETCHER is None:
+            _FETCHER = Fetcher(cache=ResponseCache.from_config(),
+                               **CONFIG.get('fetch', {}))
+        return _FETCHER
+
+
+def fetch_many(urls, max_workers=None):
+    """
+    GET a list of URLs concurrently through the shared Fetcher, returning
+    the responses in the same order as `urls`
+    """
+    return get_fetcher().get_many(urls, max_concurrency=max_workers)
@@ -1,9 +1,28 @@
 
-from bs4 import BeautifulSoup as bs
+from collections import OrderedDict, namedtuple
 from datetime import datetime as dt
+from functools import lru_cache
+from operator import itemgetter
 import pytz
 
 
+EASTERN = pytz.timezone('US/Eastern')
+UTC = pytz.utc
+
+KICKOFF_FORMAT = '%Y-%m-%dT%H:%MZ'
+TIME_FORMAT = '%I:%M %p %Z'
+
+
+@lru_cache(maxsize=1024)
+def parse_kickoff(date_str):
+    """
+    Convert an ESPN kickoff timestamp (eg. '2021-11-25T20:30Z') to a
+    timezone-aware datetime in US/Eastern. Results are memoized since
+    most games in a week share a handful of kickoff slots.
+    """
+    return UTC.localize(dt.strptime(date_str, KICKOFF_FORMAT)).astimezone(EASTERN)
+
+
 def get_home_team(game):
     try:
         value = game['teams'][0]['displayName']
@@ -34,12 +53,17 @@ def get_away_abbr(game):
     return value
 
 
-def get_game_date(game):
+def get_game_kickoff(game):
     try:
-        eastern = pytz.timezone('US/Eastern')
-        utc = pytz.utc
+        value = parse_kickoff(game['date'])
+    except:
+        value = None
+    return value
+
 
-        value = utc.localize(dt.strptime(game['date'], '%Y-%m-%dT%H:%MZ')).astimezone(eastern).date()
+def get_game_date(game):
+    try:
+        value = parse_kickoff(game['date']).date()
     except:
         value = ''
     return value
@@ -47,10 +71,7 @@ def get_game_date(game):
 
 def get_game_time(game):
     try:
-        eastern = pytz.timezone('US/Eastern')
-        utc = pytz.utc
-
-        value = utc.localize(dt.strptime(game['date'], '%Y-%m-%dT%H:%MZ')).astimezone(eastern).strftime('%I:%M %p %Z')
+        value = parse_kickoff(game['date']).strftime(TIME_FORMAT)
     except:
         value = ''
     return value
@@ -191,16 +212,29 @@ def get_away_score(game):
         return 0
 
 
+def _status_complete(status):
+    # Older scoreboard payloads only carry the game 'state' (pre/in/post)
+    if 'type' in status:
+        return status['type']['completed']
+    return status['state'] == 'post'
+
+
+def _status_started(status):
+    if 'period' in status:
+        return status['period'] > 0
+    return status['state'] in ('in', 'post')
+
+
 def get_game_finish(game):
     try:
-        return game['status']['type']['completed']
+        return _status_complete(game['status'])
     except:
         return None
 
 
 def get_game_started(game):
     try:
-        return game['status']['period'] > 0
+        return _status_started(game['status'])
     except:
         return None
 
@@ -219,6 +253,13 @@ def get_game_clock(game):
         return ''
 
 
+def get_game_id(game):
+    try:
+        return game['id']
+    except:
+        return ''
+
+
 def get_home_rank(game):
     try:
         rank = game['teams'][0]['rank']
@@ -239,3 +280,172 @@ def get_away_rank(game):
             return None
     except:
         return None
+
+
+def format_networks(networks):
+    return str(networks).replace('u', '').strip('[]').replace("'", "") \
+        .replace('ABC, ESPN3', 'ABC')
+
+
+def _top25_rank(rank):
+    if rank <= 25 and rank > 0:
+        return rank
+    else:
+        return None
+
+
+# Sub-lookups shared by several fields, resolved once per game. A lookup
+# that raises leaves every field reading from it at its default value.
+SCOPES = OrderedDict([
+    ('game', lambda game: game),
+    ('kickoff', lambda game: parse_kickoff(game['date'])),
+    ('home', lambda game: game['teams'][0]),
+    ('away', lambda game: game['teams'][1]),
+    ('odds', lambda game: game['odds']),
+    ('odds_line', lambda game: parse_game_odds_line(get_game_odds_line(game))),
+    ('weather', lambda game: game['wthr']),
+    ('weather_temp', get_game_weather_temp),
+    ('venue', lambda game: game['vnue']),
+    ('address', lambda game: game['vnue']['address']),
+    ('status', lambda game: game['status']),
+    ('competitors', lambda game: game['competitors']),
+])
+
+GameField = namedtuple('GameField', ['name', 'scope', 'getter', 'default'])
+
+GAME_FIELDS = (
+    GameField('date', 'kickoff', lambda k: k.date(), ''),
+    GameField('time', 'kickoff', lambda k: k.strftime(TIME_FORMAT), ''),
+    GameField('kickoff', 'kickoff', lambda k: k, None),
+    GameField('networks', 'game',
+              lambda g: format_networks(get_game_networks(g)), ''),
+    GameField('home_team', 'home', itemgetter('displayName'), ''),
+    GameField('home_abbr', 'home', itemgetter('abbrev'), ''),
+    GameField('away_team', 'away', itemgetter('displayName'), ''),
+    GameField('away_abbr', 'away', itemgetter('abbrev'), ''),
+    GameField('has_odds', 'odds', lambda o: 'details' in o, None),
+    GameField('odds_provider', 'odds', itemgetter('pvdr'), ''),
+    GameField('odds_line', 'odds', itemgetter('details'), None),
+    GameField('odds_line_fav', 'odds_line', itemgetter(0), None),
+    GameField('odds_line_spread', 'odds_line', itemgetter(1), None),
+    GameField('odds_ou', 'odds',
+              lambda o: float(o['oU'].split(' : ')[1]), None),
+    GameField('neutral_site', 'game', get_neutral_site_ind, None),
+    GameField('weather_conditions', 'weather',
+              itemgetter('displayValue'), ''),
+    GameField('weather_temp_type', 'weather_temp', itemgetter(0), ''),
+    GameField('weather_temp_value', 'weather_temp', itemgetter(1), ''),
+    GameField('venue_name', 'venue', itemgetter('fullName'), ''),
+    GameField('venue_city', 'address', itemgetter('city'), ''),
+    GameField('venue_state', 'address', itemgetter('state'), ''),
+    GameField('venue_city_state', 'address',
+              lambda a: '{}, {}'.format(a.get('city', ''), a.get('state', '')),
+              ', '),
+    GameField('home_record', 'home',
+              lambda t: t['records'][0]['summary'], ''),
+    GameField('away_record', 'away',
+              lambda t: t['records'][0]['summary'], ''),
+    GameField('conf_game_ind', 'game', get_conf_game_ind, None),
+    GameField('home_score', 'competitors', lambda c: c[0]['score'], 0),
+    GameField('away_score', 'competitors', lambda c: c[1]['score'], 0),
+    GameField('home_rank', 'home', lambda t: _top25_rank(t['rank']), None),
+    GameField('away_rank', 'away', lambda t: _top25_rank(t['rank']), None),
+    GameField('game_started', 'status', _status_started, None),
+    GameField('game_complete', 'status', _status_complete, None),
+    GameField('game_quarter', 'status', itemgetter('period'), ''),
+    GameField('game_clock', 'status', itemgetter('displayClock'), ''),
+    GameField('game_id', 'game', itemgetter('id'), ''),
+)
+
+GAME_FIELD_NAMES = tuple(f.name for f in GAME_FIELDS)
+
+# pandas dtype of each field in game frames; '' placeholders become missing
+GAME_SCHEMA = {
+    'date': 'datetime64[ns]',
+    'time': 'category',
+    'kickoff': 'datetime64[ns, US/Eastern]',
+    'networks': 'category',
+    'home_team': 'category',
+    'home_abbr': 'category',
+    'away_team': 'category',
+    'away_abbr': 'category',
+    'has_odds': 'boolean',
+    'odds_provider': 'category',
+    'odds_line': 'string',
+    'odds_line_fav': 'string',
+    'odds_line_spread': 'float32',
+    'odds_ou': 'float32',
+    'neutral_site': 'boolean',
+    'weather_conditions': 'category',
+    'weather_temp_type': 'category',
+    'weather_temp_value': 'Int16',
+    'venue_name': 'category',
+    'venue_city': 'category',
+    'venue_state': 'category',
+    'venue_city_state': 'category',
+    'home_record': 'category',
+    'away_record': 'category',
+    'conf_game_ind': 'boolean',
+    'home_score': 'Int16',
+    'away_score': 'Int16',
+    'home_rank': 'Int8',
+    'away_rank': 'Int8',
+    'game_started': 'boolean',
+    'game_complete': 'boolean',
+    'game_quarter': 'Int8',
+    'game_clock': 'category',
+    'game_id': 'string',
+}
+
+def compile_extractor(fields=GAME_FIELDS):
+    """
+    Compile a field spec into a single function that turns one game from
+    the scoreboard `evts` list into a tuple of field values, in the order
+    of `fields`. Each scope used by the spec is looked up once per game,
+    and the fields are read from their scope through precomputed
+    (scope index, getter, default) entries.
+
+    Parameters
+    ----------
+    fields : sequence of GameField (default GAME_FIELDS)
+        Field spec to compile
+
+    Returns
+    -------
+    extract : function
+        Function taking a single game dict and returning a tuple
+    """
+    scope_names = [s for s in SCOPES if any(f.scope == s for f in fields)]
+    unknown = set(f.scope for f in fields) - set(scope_names)
+    if unknown:
+        raise ValueError(f"Unknown field scopes: {sorted(unknown)}")
+
+    lookups = tuple(SCOPES[scope] for scope in scope_names)
+    entries = tuple((scope_names.index(f.scope), f.getter, f.default)
+                    for f in fields)
+    # Stands in for the scope of a game whose lookup failed
+    missing = object()
+
+    def extract(game):
+        scopes = []
+        for lookup in lookups:
+            try:
+                scopes.append(lookup(game))
+            except Exception:
+                scopes.append(missing)
+        values = []
+        for s, getter, default in entries:
+            scope = scopes[s]
+            if scope is missing:
+                values.append(default)
+                continue
+            try:
+                values.append(getter(scope))
+            except Exception:
+                values.append(default)
+        return tuple(values)
+
+    return extract
+
+
+extract_game_record = compile_extractor()
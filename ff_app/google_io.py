@@ -2,7 +2,11 @@ import pandas as pd
 import os
 import inspect
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -10,22 +14,163 @@ from google.oauth2.credentials import Credentials
 from oauth2client.service_account import ServiceAccountCredentials
 
 from .config import CONFIG
+from .metrics import METRICS
 
 
 LOGGER = logging.getLogger(__file__)
 
+# Sheets services shared by every GoogleSheetsReadWrite using the same
+# credentials and endpoint, so the discovery document is only processed
+# and the HTTP connection only opened once per process
+_SERVICES = {}
+_SERVICES_LOCK = threading.Lock()
+
+
+def coerce_dtypes(df, dtypes):
+    """
+    Convert the string columns of a sheet read to typed columns in place,
+    one vectorized conversion per column; empty cells become missing
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Sheet contents as read, with string values
+
+    dtypes : dict
+        pandas dtype keyed by column name, eg. `data_prep.PICK_SHEET_SCHEMA`;
+        columns not in the frame are ignored
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The same frame, with its columns converted
+    """
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        values = df[col].astype(object).mask(df[col] == '')
+        kind = pd.api.types.pandas_dtype(dtype).kind
+        if kind in 'iuf':
+            values = pd.to_numeric(values, errors='coerce')
+            df[col] = (values if kind == 'f' else values.round()).astype(dtype)
+        elif kind == 'b':
+            df[col] = values.str.upper().map({'TRUE': True, 'FALSE': False}) \
+                .astype(dtype)
+        elif kind == 'M':
+            df[col] = pd.to_datetime(values, errors='coerce').astype(dtype)
+        else:
+            df[col] = values.astype(dtype)
+    return df
+
+
+def _authorized_http(creds, timeout=None):
+    """
+    Long-lived authorized httplib2 transport; httplib2 keeps the
+    connection to the API host open between requests
+    """
+    http = httplib2.Http(timeout=timeout)
+    if hasattr(creds, 'authorize'):
+        # oauth2client credentials
+        return creds.authorize(http)
+    return AuthorizedHttp(creds, http=http)
+
 
 class GoogleSheetsReadWrite:
     def __init__(self,
                  spreadsheet_id=None,
-                 creds_dir=None):
+                 creds_dir=None,
+                 creds=None,
+                 api_endpoint=None):
         """
+        Parameters
+        ----------
+        spreadsheet_id : str (default None)
+            ID of the pick em spreadsheet; defaults to the configured ID
+
+        creds_dir : str (default None)
+            Directory holding 'token.json' / 'credentials.json'
+
+        creds : google.auth.credentials.Credentials (default None)
+            Credentials to use directly instead of loading them from
+            `creds_dir`
+
+        api_endpoint : str (default None)
+            Root URL of the Sheets API, eg. a local fake Sheets server;
+            defaults to `google.api_endpoint` in the config, if set, or
+            the public Google endpoint
         """
         self.spreadsheet_id = spreadsheet_id \
             or CONFIG['google']['spreadsheet_id']
-        self.creds = self.get_credentials(creds_dir)
+        self.creds = creds or self.get_credentials(creds_dir)
+        self.api_endpoint = api_endpoint \
+            or CONFIG['google'].get('api_endpoint')
+        creds_key = id(creds) if creds else os.path.abspath(
+            creds_dir or os.path.expanduser(CONFIG['google']['credentials_path']))
+        self._service_key = (creds_key, self.api_endpoint)
+        self._service = None
+        self._sheet_values = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def service(self):
+        """
+        Sheets API service, built on first use and shared with any other
+        instance holding the same credentials and endpoint. The shared
+        service is looked up on every access, so an instance picks up a
+        new one after another instance closed it. The underlying httplib2
+        transport is not thread-safe, so concurrent callers should each
+        use their own credentials object.
+        """
+        service = _SERVICES.get(self._service_key)
+        if service is None:
+            with _SERVICES_LOCK:
+                if self._service_key not in _SERVICES:
+                    LOGGER.debug("Building Sheets service for %s",
+                                 self.api_endpoint or 'default endpoint')
+                    client_options = {'api_endpoint': self.api_endpoint} \
+                        if self.api_endpoint else None
+                    _SERVICES[self._service_key] = build(
+                        'sheets', 'v4',
+                        http=_authorized_http(self.creds),
+                        client_options=client_options)
+                service = _SERVICES[self._service_key]
+        if service is not self._service:
+            # The values resource belongs to the service it was built from
+            self._service = service
+            self._sheet_values = None
+        return service
+
+    @property
+    def sheet_values(self):
+        """
+        `spreadsheets().values()` resource of the service. googleapiclient
+        rebuilds a resource's methods from the discovery document on every
+        call, so the resource is built once per service and reused for
+        every request.
+        """
+        service = self.service
+        if self._sheet_values is None:
+            self._sheet_values = service.spreadsheets().values()
+        return self._sheet_values
+
+    def close(self):
+        """
+        Close the shared Sheets service and its HTTP connections. Any
+        instance sharing it, this one included, builds a new service on
+        its next request.
+        """
+        with _SERVICES_LOCK:
+            service = _SERVICES.pop(self._service_key, None)
+        if service is not None:
+            service.close()
+        self._service = None
+        self._sheet_values = None
 
-        
     def get_credentials(self, creds_dir):
         """
         """
@@ -59,22 +204,122 @@ class GoogleSheetsReadWrite:
                 token.write(creds.to_json())
         return creds
 
-    def read(self, sheet_name, sheet_range):
+    def read(self, sheet_name, sheet_range=None):
         """
+        Read a range of a sheet into a DataFrame, using its first row as
+        the header; the whole sheet is read if `sheet_range` is None
         """
-        range_name = f'{sheet_name}!{sheet_range}'
-
-        service = build('sheets', 'v4', credentials=self.creds)
+        range_name = f'{sheet_name}!{sheet_range}' if sheet_range \
+            else sheet_name
 
         # Call the Sheets API
-        sheet = service.spreadsheets()
-        result = sheet.values().get(spreadsheetId=self.spreadsheet_id,
-                                    range=range_name).execute()
+        result = self._execute(self.sheet_values.get(
+            spreadsheetId=self.spreadsheet_id, range=range_name))
         values = result.get('values', [])
         LOGGER.info("Read %s rows from %s", len(values), range_name)
-        results_df = pd.DataFrame(columns=values[0], data=values[1:])
+        if not values:
+            return pd.DataFrame()
+        # The API drops trailing empty cells, so pad rows to the header
+        n_cols = len(values[0])
+        data = [row[:n_cols] + [''] * (n_cols - len(row)) for row in values[1:]]
+        results_df = pd.DataFrame(columns=values[0], data=data)
         return results_df
 
+    def read_many(self, sheet_names, sheet_range=None, dtypes=None,
+                  chunk_size=100, max_workers=4):
+        """
+        Read several sheets at once with `values.batchGet`: one request
+        for up to `chunk_size` sheets, with larger reads split into chunks
+        that are requested concurrently
+
+        Parameters
+        ----------
+        sheet_names : list of str
+            Sheets to read, eg. every player in `player_list`
+
+        sheet_range : str (default None)
+            A1 range read from every sheet, eg. 'A:J'; whole sheets are
+            read if None
+
+        dtypes : dict (default None)
+            pandas dtype keyed by column name, applied with
+            `coerce_dtypes`; values are left as strings if None
+
+        chunk_size : int (default 100)
+            Maximum number of ranges per `values.batchGet` request
+
+        max_workers : int (default 4)
+            Maximum number of chunk requests in flight at once
+
+        Returns
+        -------
+        sheets : dict
+            DataFrame of each sheet keyed by sheet name, as from `read`
+        """
+        names = list(dict.fromkeys(sheet_names))
+        ranges = [f'{name}!{sheet_range}' if sheet_range else name
+                  for name in names]
+        chunks = [ranges[i:i + chunk_size]
+                  for i in range(0, len(ranges), chunk_size)]
+        if len(chunks) <= 1:
+            results = [self._batch_get(chunk) for chunk in chunks]
+        else:
+            # The shared service's transport is not thread-safe, so each
+            # chunk request gets its own connection
+            _ = self.sheet_values  # build the values resource before fanning out threads
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                results = list(pool.map(
+                    lambda chunk: self._batch_get(
+                        chunk, http=_authorized_http(self.creds)),
+                    chunks))
+        values = [r.get('values', []) for result in results
+                  for r in result.get('valueRanges', [])]
+        LOGGER.info("Read %s sheets in %s batchGet requests",
+                    len(names), len(chunks))
+        return self._build_frames(names, values, dtypes)
+
+    def _batch_get(self, ranges, http=None):
+        return self._execute(self.sheet_values.batchGet(
+            spreadsheetId=self.spreadsheet_id, ranges=ranges), http=http)
+
+    @staticmethod
+    def _execute(request, http=None):
+        """
+        Execute a Sheets API request, counting it in the run metrics
+        """
+        METRICS.incr('sheets_requests')
+        return request.execute(http=http)
+
+    @staticmethod
+    def _build_frames(names, sheet_values, dtypes=None):
+        """
+        DataFrames of several sheets' values. Sheets sharing a header are
+        built as one frame, so dtype coercion runs once per column for all
+        of them, and then split back apart.
+        """
+        frames = {name: pd.DataFrame() for name in names}
+        groups = {}
+        for name, values in zip(names, sheet_values):
+            if values:
+                groups.setdefault(tuple(values[0]), []).append((name, values))
+
+        for header, sheets in groups.items():
+            n_cols = len(header)
+            data = []
+            bounds = []
+            for name, values in sheets:
+                start = len(data)
+                # The API drops trailing empty cells, so pad rows to the header
+                data += [row[:n_cols] + [''] * (n_cols - len(row))
+                         for row in values[1:]]
+                bounds.append((name, start, len(data)))
+            df = pd.DataFrame(columns=list(header), data=data)
+            if dtypes:
+                coerce_dtypes(df, dtypes)
+            for name, start, end in bounds:
+                frames[name] = df.iloc[start:end].reset_index(drop=True)
+        return frames
+
     def write(self, sheet_name, data):
         """
         """
@@ -86,19 +331,231 @@ class GoogleSheetsReadWrite:
         sheet_range = 'A:{}'.format(self._get_upper_range_limit(data.shape[1]))
         range_name = f'{sheet_name}!{sheet_range}'
 
-        service = build('sheets', 'v4', credentials=self.creds)
-        
         values = [list(x) for x in data.to_records(index=False)]
         body = {'values': values}
         LOGGER.debug("Attempting to write %s rows to %s",
                      len(values), range_name)
-        result = service.spreadsheets().values().append(
+        result = self._execute(self.sheet_values.append(
             spreadsheetId=self.spreadsheet_id,
             range=range_name,
             valueInputOption='USER_ENTERED',
-            body=body).execute()
-        LOGGER.info('Appended %s cells to %s',
-                    result.get('updates').get('updatedCells'), range_name)
+            body=body))
+        cells = result.get('updates').get('updatedCells')
+        METRICS.incr('sheets_cells_written', cells or 0)
+        LOGGER.info('Appended %s cells to %s', cells, range_name)
+
+    def write_batch(self, sheet_data):
+        """
+        Append data to several sheets with a single `values.batchUpdate`
+        call. The next empty row of each sheet is found first with one
+        `values.batchGet` over column A, so the whole upload costs two
+        requests regardless of the number of sheets.
+
+        Parameters
+        ----------
+        sheet_data : dict
+            Mapping of sheet name to the pandas DataFrame appended to it
+
+        Returns
+        -------
+        updated_cells : dict
+            Number of cells written, keyed by the updated A1 range
+        """
+        assert all(isinstance(k, str) for k in sheet_data), \
+            "Sheet names must be passed as strings"
+        assert all(isinstance(v, pd.DataFrame) for v in sheet_data.values()), \
+            "Sheet data must be passed as pandas DataFrames"
+        if not sheet_data:
+            return {}
+
+        sheet_values = self.sheet_values
+
+        names = list(sheet_data)
+        result = self._execute(sheet_values.batchGet(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=[f'{name}!A:A' for name in names]))
+        used_rows = [len(r.get('values', []))
+                     for r in result.get('valueRanges', [])]
+
+        data = []
+        for name, used in zip(names, used_rows):
+            df = sheet_data[name]
+            end_col = self._get_upper_range_limit(df.shape[1])
+            data.append({
+                'range': f'{name}!A{used + 1}:{end_col}',
+                'values': [list(x) for x in df.to_records(index=False)]
+            })
+        LOGGER.debug("Attempting to write %s ranges in one batch", len(data))
+        result = self._execute(sheet_values.batchUpdate(
+            spreadsheetId=self.spreadsheet_id,
+            body={'valueInputOption': 'USER_ENTERED',
+                  'data': data}))
+
+        updated_cells = {r.get('updatedRange'): r.get('updatedCells', 0)
+                         for r in result.get('responses', [])}
+        for range_name, cells in updated_cells.items():
+            LOGGER.info('Wrote %s cells to %s', cells, range_name)
+        LOGGER.info('Wrote %s cells across %s ranges',
+                    result.get('totalUpdatedCells'), len(updated_cells))
+        METRICS.incr('sheets_cells_written',
+                     result.get('totalUpdatedCells') or 0)
+        return updated_cells
+
+    def sync(self, sheet_data, key, append_new=True, header=None):
+        """
+        Incrementally sync data to several sheets. The sheets are read with
+        one `values.batchGet`, rows are matched on `key`, and only the cells
+        that changed plus any new rows are sent, in a single
+        `values.batchUpdate` call. Rerunning with the same data sends
+        nothing.
+
+        Sheets may carry a header row naming the DataFrame columns; an
+        empty sheet gets the header written along with the data, and
+        columns missing from an existing header are added to its end.
+        Sheets filled by `write` or `write_batch` have no header, and their
+        columns are taken to be in the DataFrame's order.
+
+        Parameters
+        ----------
+        sheet_data : dict
+            Mapping of sheet name to the pandas DataFrame of string values
+            that the sheet should contain
+
+        key : function
+            Function taking a DataFrame and returning a Series of keys
+            identifying each row, eg. `data_prep.game_keys`
+
+        append_new : bool (default True)
+            Indicator for whether rows whose key is not in the sheet are
+            appended; if False they are ignored, so a subset of columns can
+            be synced onto existing rows
+
+        header : bool (default None)
+            Indicator for whether the sheets' first row is a header. If
+            None, a first row naming any of the DataFrame's columns is
+            taken as a header, and empty sheets get one
+
+        Returns
+        -------
+        updated_cells : dict
+            Number of cells written, keyed by sheet name
+        """
+        data = []
+        updated_cells = {}
+        sheets = self.read_many(list(sheet_data))
+        for sheet_name, df in sheet_data.items():
+            current = sheets[sheet_name]
+            ranges = self._diff_ranges(sheet_name, current, df, key,
+                                       append_new, header)
+            updated_cells[sheet_name] = sum(
+                len(row) for r in ranges for row in r['values'])
+            data += ranges
+
+        if data:
+            LOGGER.debug("Attempting to sync %s ranges in one batch",
+                         len(data))
+            self._execute(self.sheet_values.batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={'valueInputOption': 'USER_ENTERED',
+                      'data': data}))
+            METRICS.incr('sheets_cells_written', sum(updated_cells.values()))
+        for sheet_name, cells in updated_cells.items():
+            LOGGER.info('Synced %s changed cells to %s', cells, sheet_name)
+        return updated_cells
+
+    def _diff_ranges(self, sheet_name, current, new, key, append_new=True,
+                     has_header=None):
+        """
+        Value ranges needed to bring the sheet contents `current` (read
+        with its first row as the header) in line with `new`
+        """
+        columns = list(new.columns)
+        new_rows = [list(x) for x in new.to_records(index=False)]
+        if current.empty and not len(current.columns):
+            end_col = self._column_letter(len(columns) - 1)
+            values = new_rows if has_header is False else [columns] + new_rows
+            return [{'range': f'{sheet_name}!A1:{end_col}',
+                     'values': values}] if new_rows else []
+
+        header = list(current.columns)
+        if has_header is None:
+            has_header = any(c in columns for c in header)
+        if not has_header:
+            # The first row read as the header is data; name the sheet's
+            # columns after the DataFrame's, in order
+            width = len(header)
+            names = columns[:width] + [f'_{i}' for i in
+                                       range(len(columns), width)]
+            current = pd.DataFrame([header] + current.values.tolist(),
+                                   columns=names)
+            for c in columns[width:]:
+                current[c] = ''
+            header = list(current.columns)
+        # Sheet row of the first data row
+        first_row = 2 if has_header else 1
+
+        ranges = []
+        missing = [c for c in columns if c not in header]
+        if missing:
+            start_col = self._column_letter(len(header))
+            ranges.append({'range': f'{sheet_name}!{start_col}1',
+                           'values': [missing]})
+            for c in missing:
+                current[c] = ''
+            header += missing
+        positions = [header.index(c) for c in columns]
+        current_rows = dict()
+        for i, k in enumerate(key(current)):
+            current_rows.setdefault(k, i)
+
+        appended = []
+        for k, row in zip(key(new), new_rows):
+            i = current_rows.get(k)
+            if i is None:
+                if append_new:
+                    appended.append(row)
+                continue
+            old = current.iloc[i]
+            for value, pos in zip(row, positions):
+                if self._same_cell(old.iloc[pos], value):
+                    continue
+                ranges.append({
+                    'range': f'{sheet_name}!{self._column_letter(pos)}'
+                             f'{i + first_row}',
+                    'values': [[value]]})
+        if appended:
+            start = len(current) + first_row
+            end_col = self._column_letter(len(columns) - 1)
+            ranges.append({
+                'range': f'{sheet_name}!A{start}:{end_col}',
+                'values': appended})
+        return ranges
+
+    @staticmethod
+    def _same_cell(sheet_value, value):
+        """
+        Sheets re-renders numbers entered as USER_ENTERED (eg. '0.0' reads
+        back as '0'), so numeric cells are compared by value
+        """
+        if sheet_value == value:
+            return True
+        try:
+            return float(sheet_value) == float(value)
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def _column_letter(index):
+        """
+        A1 column letter(s) for a zero-based column index
+        """
+        import string
+        letters = ''
+        index += 1
+        while index:
+            index, rem = divmod(index - 1, 26)
+            letters = string.ascii_uppercase[rem] + letters
+        return letters
 
     def _get_upper_range_limit(self, length):
         """
@@ -0,0 +1,295 @@
+"""
+Grades every player's picks against the spread for many games at once
+
+Picks are laid out as a players x games matrix of the side taken (+1
+favorite, -1 underdog, 0 no pick). The games' results against the spread
+form a vector. Each pick's outcome is then a single broadcast product,
+so a season for a large league is graded in one NumPy pass.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .config import CONFIG
+from .data_prep import PICK_SHEET_SCHEMA, game_keys
+
+
+LOGGER = logging.getLogger(__file__)
+
+# Column of the players' sheets holding the team picked
+PICK_COLUMN = 'Pick'
+
+# Outcome codes of the graded matrix
+LOSS = -1
+PUSH = 0
+COVER = 1
+NO_PICK = 2
+PENDING = 3
+
+OUTCOME_LABELS = {LOSS: 'loss', PUSH: 'push', COVER: 'cover',
+                  NO_PICK: 'no pick', PENDING: 'pending'}
+
+
+def _normalize_team(team):
+    return '' if pd.isna(team) else str(team).strip().upper()
+
+
+def _factorize(values, label):
+    """
+    Integer codes of `values` and the `label` of each distinct value, so
+    string handling runs once per distinct value rather than per row
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return codes, [label(value) for value in uniques]
+
+
+def result_keys(results):
+    """
+    Game keys ('<week>|<home abbr>|<away abbr>') of scoreboard games, eg.
+    from `scrape_espn.pull_games` ('week' column) or a single week's
+    `game_data_df` with a 'Week' column added
+    """
+    week_col = 'Week' if 'Week' in results.columns else 'week'
+    if week_col not in results.columns:
+        raise ValueError("Scoreboard results need a 'Week' or 'week' column")
+    return results[week_col].astype(str) + '|' \
+        + results['home_abbr'].astype(str) + '|' \
+        + results['away_abbr'].astype(str)
+
+
+def cover_vector(lines, results):
+    """
+    Result of each game against the spread from the favorite's side
+
+    Parameters
+    ----------
+    lines : pandas.DataFrame
+        Picks view of the games graded, as from `pick_sheet_summary`
+
+    results : pandas.DataFrame
+        Scoreboard games with 'home_score', 'away_score' and
+        'game_complete', keyed by week and home/away abbreviation
+
+    Returns
+    -------
+    cover : numpy.ndarray
+        +1 where the favorite covered, 0 for a push and -1 where the
+        underdog covered, as int8
+
+    complete : numpy.ndarray
+        Boolean indicator for games that are final
+    """
+    positions = pd.Index(result_keys(results)).get_indexer(game_keys(lines))
+    found = positions >= 0
+    if not found.all():
+        LOGGER.warning("No scoreboard result for %s of %s games",
+                       (~found).sum(), len(found))
+
+    def take(col, fill):
+        values = np.full(len(positions), fill, dtype=float)
+        values[found] = pd.to_numeric(results[col]).to_numpy(
+            dtype=float, na_value=fill)[positions[found]]
+        return values
+
+    home_score = take('home_score', np.nan)
+    away_score = take('away_score', np.nan)
+    complete = take('game_complete', 0.).astype(bool) \
+        & ~np.isnan(home_score) & ~np.isnan(away_score)
+
+    fav_home = lines['Location'].to_numpy() == 'vs'
+    fav_score = np.where(fav_home, home_score, away_score)
+    dog_score = np.where(fav_home, away_score, home_score)
+    spread = pd.to_numeric(lines['Spread'], errors='coerce').to_numpy(
+        dtype=float, na_value=0.)
+    margin = np.nan_to_num(fav_score - dog_score + spread)
+    return np.sign(margin).astype(np.int8), complete
+
+
+def pick_matrix(lines, player_picks, pick_column=PICK_COLUMN,
+                warn_unmatched=True):
+    """
+    Players x games matrix of the side each player took
+
+    Parameters
+    ----------
+    lines : pandas.DataFrame
+        Picks view of the games graded; its rows are the matrix columns
+
+    player_picks : dict
+        Each player's picks keyed by player name, as DataFrames with a
+        'Week' column and a `pick_column` naming the team picked, eg. the
+        picks view read back from their sheet. A pick is matched to the
+        game that team plays that week, so row order does not matter
+
+    pick_column : str (default 'Pick')
+        Column holding the team picked
+
+    warn_unmatched : bool (default True)
+        Indicator for whether to log picks that match none of the games,
+        eg. misspelled teams; turn off when grading a subset of the games
+        the players picked
+
+    Returns
+    -------
+    sides : numpy.ndarray
+        int8 matrix of +1 (favorite), -1 (underdog) or 0 (no pick or a
+        team without a game that week)
+    """
+    players = list(player_picks)
+    sides = np.zeros((len(players), len(lines)), dtype=np.int8)
+    frames = [df for df in player_picks.values() if len(df)]
+    if not frames or not len(lines):
+        return sides
+
+    # (week, team) -> game column and side, for both teams of every game
+    weeks = [str(week) for week in lines['Week']]
+    teams = {}
+    for side, col in [(1, 'Favorite'), (-1, 'Underdog')]:
+        for game, (week, team) in enumerate(zip(weeks, lines[col])):
+            teams[week, _normalize_team(team)] = (game, side)
+
+    def stacked(col):
+        return np.concatenate([df[col].to_numpy(dtype=object) for df in frames])
+
+    rows = np.repeat(np.arange(len(players)),
+                     [len(df) for df in player_picks.values()])
+    # Look up each distinct (week, pick) once and spread the result back
+    week_codes, pick_weeks = _factorize(stacked('Week'), str)
+    team_codes, pick_teams = _factorize(stacked(pick_column), _normalize_team)
+    pair_codes, pairs = pd.factorize(week_codes * len(pick_teams) + team_codes)
+    pairs = [(pick_weeks[pair // len(pick_teams)],
+              pick_teams[pair % len(pick_teams)]) for pair in pairs]
+    matches = [teams.get(pair, (-1, 0)) for pair in pairs]
+    games = np.array([game for game, _ in matches], dtype=np.int64)[pair_codes]
+    side = np.array([s for _, s in matches], dtype=np.int8)[pair_codes]
+
+    known = games >= 0
+    picked = np.array([team != '' for _, team in pairs])[pair_codes]
+    if warn_unmatched and (picked & ~known).any():
+        LOGGER.warning("Ignoring %s picks of teams without a game that week",
+                       (picked & ~known).sum())
+    sides[rows[known], games[known]] = side[known]
+    return sides
+
+
+def grade_picks(lines, results, player_picks, pick_column=PICK_COLUMN,
+                missed_mandatory_loss=None, warn_unmatched=True):
+    """
+    Grade every player's picks against the spread
+
+    Parameters
+    ----------
+    lines : pandas.DataFrame
+        Picks view of the games graded, as from `pick_sheet_summary`,
+        for one or many weeks
+
+    results : pandas.DataFrame
+        Scoreboard games with scores and completion, as from
+        `scrape_espn.pull_games`
+
+    player_picks : dict
+        Each player's picks keyed by player name; see `pick_matrix`
+
+    pick_column : str (default 'Pick')
+        Column of the players' sheets holding the team picked
+
+    missed_mandatory_loss : bool (default None)
+        Indicator for whether a 'Mandatory' game left unpicked counts as
+        a loss once final; defaults to `grading.missed_mandatory_loss`
+        in the config, or True
+
+    warn_unmatched : bool (default True)
+        See `pick_matrix`
+
+    Returns
+    -------
+    outcomes : pandas.DataFrame
+        int8 outcome codes (COVER, PUSH, LOSS, NO_PICK or PENDING), one
+        row per player and one column per game key
+    """
+    if missed_mandatory_loss is None:
+        missed_mandatory_loss = CONFIG.get('grading', {}) \
+            .get('missed_mandatory_loss', True)
+    cover, complete = cover_vector(lines, results)
+    sides = pick_matrix(lines, player_picks, pick_column, warn_unmatched)
+
+    outcomes = np.where(sides == 0, np.int8(NO_PICK), sides * cover)
+    if missed_mandatory_loss:
+        mandatory = lines['Mandatory'].to_numpy() == 'Y'
+        outcomes[(sides == 0) & mandatory] = LOSS
+    outcomes[:, ~complete] = PENDING
+    return pd.DataFrame(outcomes.astype(np.int8), index=list(player_picks),
+                        columns=game_keys(lines).to_numpy())
+
+
+def grade_summary(outcomes, lines=None):
+    """
+    Record of each player from graded outcomes
+
+    Parameters
+    ----------
+    outcomes : pandas.DataFrame
+        Outcome matrix from `grade_picks`
+
+    lines : pandas.DataFrame (default None)
+        Picks view the outcomes were graded from; adds the record in
+        'Mandatory' games if given
+
+    Returns
+    -------
+    summary : pandas.DataFrame
+        Covers, losses, pushes, unpicked and pending games and the win
+        percentage of decided picks per player, best record first
+    """
+    values = outcomes.to_numpy()
+    summary = pd.DataFrame({
+        'Wins': (values == COVER).sum(axis=1),
+        'Losses': (values == LOSS).sum(axis=1),
+        'Pushes': (values == PUSH).sum(axis=1),
+        'No Pick': (values == NO_PICK).sum(axis=1),
+        'Pending': (values == PENDING).sum(axis=1),
+    }, index=outcomes.index)
+    decided = summary['Wins'] + summary['Losses']
+    summary['Win Pct'] = (summary['Wins'] / decided.where(decided > 0)) \
+        .round(3)
+    if lines is not None:
+        mandatory = lines['Mandatory'].to_numpy() == 'Y'
+        summary['Mandatory Wins'] = (values[:, mandatory] == COVER).sum(axis=1)
+        summary['Mandatory Losses'] = (values[:, mandatory] == LOSS).sum(axis=1)
+    return summary.sort_values(['Wins', 'Win Pct'], ascending=False)
+
+
+def read_player_picks(sheets_io, players=None, pick_column=PICK_COLUMN):
+    """
+    Read each player's picks back from their sheet, all in one batched
+    request. Sheets without a `pick_column` (eg. only the uploaded picks
+    view) are skipped with a warning.
+
+    Parameters
+    ----------
+    sheets_io : GoogleSheetsReadWrite
+        Connection to the pickem spreadsheet
+
+    players : list (default None)
+        Players to read; defaults to `player_list` in the config
+
+    pick_column : str (default 'Pick')
+        Column of the players' sheets holding the team picked
+
+    Returns
+    -------
+    player_picks : dict
+        DataFrame of each player's sheet keyed by player name, with the
+        numeric columns typed by `data_prep.PICK_SHEET_SCHEMA`
+    """
+    players = players or CONFIG['player_list']
+    sheets = sheets_io.read_many(players, dtypes=PICK_SHEET_SCHEMA)
+    player_picks = {}
+    for player, df in sheets.items():
+        if pick_column not in df.columns:
+            LOGGER.warning("Skipping sheet '%s' without a '%s' column",
+                           player, pick_column)
+            continue
+        player_picks[player] = df
+    return player_picks
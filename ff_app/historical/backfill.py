@@ -0,0 +1,316 @@
+"""
+Resumable backfill of play-by-play history: calendar -> weekly summaries
+-> game ids -> drives and plays, for one or many seasons
+
+Pages are fetched concurrently through the shared Fetcher and parsed on a
+process pool. Each finished game's drives and plays are streamed as flat
+records to `<data_dir>/games/<game_id>.jsonl.gz`, which doubles as its
+checkpoint, and each finished week's summary is checkpointed as
+`<data_dir>/summary/week<week>.json`, so rerunning an interrupted backfill
+only fetches what is still missing.
+"""
+import os
+
+import json
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+from .. import fetch
+from .scrape_game_details import GAME_URL, ScrapeGamePlays
+from .scrape_game_summary import ScrapeCalendar, ScrapeSummary, parse_week_events
+from .jsonl import JsonlWriter, read_jsonl
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def write_game_records(game_id, text, path, **fields):
+    """
+    Parse a fetched play-by-play page and stream its drive and play
+    records to `path`; run on the parse pool. A completed game always has
+    drives, so a page without any (eg. an error page) raises and leaves no
+    file behind rather than being checkpointed.
+
+    Parameters
+    ----------
+    game_id : str
+        ESPN-specific unique ID for the game
+
+    text : str
+        Text of the play-by-play page
+
+    path : str
+        Output JSON-lines path, written atomically
+
+    fields
+        Extra fields added to every record, eg. year and week
+
+    Returns
+    -------
+    count : int
+        Number of records written
+    """
+    plays = ScrapeGamePlays(game_id, request_instance=SimpleNamespace(text=text))
+    with JsonlWriter(path) as writer:
+        writer.write_many(dict(fields, **record) for record in plays.iter_records())
+        if not writer.count:
+            raise ValueError("No drives found on the play-by-play page for {}".format(game_id))
+    return writer.count
+
+
+def write_json(path, data):
+    """
+    Write `data` to `path` atomically, so a checkpoint is either complete
+    or absent
+    """
+    tmp_path = '{}.tmp'.format(path)
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SeasonBackfill(ScrapeSummary):
+    """
+    Backfill of a single season's play-by-play
+
+    Parameters
+    ----------
+    year : int
+        Season to backfill
+
+    base_data_dir : str
+        Directory holding one data directory per season
+
+    batch_size : int (default 50)
+        Number of game pages fetched per batch; a batch is parsed while
+        the next one is fetched
+
+    max_fetch_workers : int (default None)
+        Maximum number of requests in flight at once; defaults to
+        `fetch.max_concurrency` in the config
+    """
+    def __init__(self, year, base_data_dir='~/football/scrape_history/raw_data',
+                 batch_size=50, max_fetch_workers=None):
+        super().__init__(year, base_data_dir)
+        self.base_data_dir = base_data_dir
+        self.batch_size = batch_size
+        self.max_fetch_workers = max_fetch_workers
+        self.games_dir = self.set_games_dir(self.data_dir)
+        self.failed_weeks = []
+
+    def set_games_dir(self, data_dir):
+        games_dir = os.path.join(data_dir, 'games')
+        os.makedirs(games_dir, exist_ok=True)
+        return games_dir
+
+    def game_path(self, game_id):
+        return os.path.join(self.games_dir, '{}.jsonl.gz'.format(game_id))
+
+    def week_numbers(self):
+        """
+        Regular season weeks from the calendar, scraping it on first use
+        """
+        week_file = os.path.join(self.data_dir, 'calendar', 'week_details.yaml')
+        if not os.path.exists(week_file):
+            ScrapeCalendar(self.year, self.base_data_dir).run()
+        with open(week_file, 'r') as f:
+            week_details = yaml.safe_load(f)
+        return sorted(week_details, key=int)
+
+    def week_events(self, weeks, pool):
+        """
+        Events of each week, from the summary checkpoints where present
+        and otherwise fetched and parsed. Weeks whose games are all
+        complete are checkpointed; weeks that fail to fetch or parse are
+        logged, recorded in `failed_weeks` and left out, so the next run
+        retries them.
+
+        Returns
+        -------
+        events : dict
+            List of events keyed by week
+        """
+        summary_dir = self.set_summary_dir(self.data_dir)
+        self.failed_weeks = []
+        events = {}
+        for week in weeks:
+            path = os.path.join(summary_dir, 'week{}.json'.format(week))
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    events[week] = json.load(f)
+
+        missing = [week for week in weeks if week not in events]
+        if missing:
+            logger.info("Fetching {} weekly summaries for {}".format(len(missing), self.year))
+            urls = [self.summary_url.format(year=self.year, week=week) for week in missing]
+            responses = fetch.get_fetcher().get_many(
+                urls, max_concurrency=self.max_fetch_workers, return_exceptions=True)
+            submitted = []
+            for week, response in zip(missing, responses):
+                if isinstance(response, Exception):
+                    logger.warning("Failed to fetch week {} summary for {}: {}".format(
+                        week, self.year, response))
+                    self.failed_weeks.append(week)
+                    continue
+                submitted.append((week, pool.submit(parse_week_events, response.text)))
+            for week, future in submitted:
+                try:
+                    week_events = future.result()
+                except Exception as e:
+                    logger.warning("Failed to parse week {} summary for {}: {!r}".format(
+                        week, self.year, e))
+                    self.failed_weeks.append(week)
+                    continue
+                events[week] = week_events
+                if all(e.get('status', {}).get('type', {}).get('completed')
+                       for e in week_events):
+                    write_json(os.path.join(summary_dir, 'week{}.json'.format(week)),
+                               week_events)
+        return {week: events[week] for week in weeks if week in events}
+
+    def completed_games(self, events):
+        """
+        (week, game id) of every completed game, in week order
+        """
+        games = []
+        for week, week_events in events.items():
+            for event in week_events:
+                if event.get('status', {}).get('type', {}).get('completed'):
+                    games.append((week, event['id']))
+        return games
+
+    def backfill_games(self, games, pool):
+        """
+        Fetch and parse every game without a checkpoint. Games that fail
+        to fetch or parse are logged and left for the next run.
+
+        Returns
+        -------
+        counts : dict
+            Number of games 'done' in this run, 'skipped' as already
+            checkpointed and 'failed'
+        """
+        pending = [(week, game_id) for week, game_id in games
+                   if not os.path.exists(self.game_path(game_id))]
+        counts = {'done': 0, 'skipped': len(games) - len(pending), 'failed': 0}
+        logger.info("{} of {} games left to backfill for {}".format(
+            len(pending), len(games), self.year))
+
+        in_flight = []
+        for batch in _batches(pending, self.batch_size):
+            urls = [GAME_URL.format(game_id=game_id) for _, game_id in batch]
+            responses = fetch.get_fetcher().get_many(
+                urls, max_concurrency=self.max_fetch_workers, return_exceptions=True)
+            submitted = []
+            for (week, game_id), response in zip(batch, responses):
+                if isinstance(response, Exception):
+                    logger.warning("Failed to fetch game {}: {}".format(game_id, response))
+                    counts['failed'] += 1
+                    continue
+                submitted.append((game_id, pool.submit(
+                    write_game_records, game_id, response.text,
+                    self.game_path(game_id), year=self.year, week=week)))
+            # The previous batch was parsing while this one was fetched
+            self._checkpoint(in_flight, counts)
+            in_flight = submitted
+        self._checkpoint(in_flight, counts)
+        return counts
+
+    def _checkpoint(self, in_flight, counts):
+        for game_id, future in in_flight:
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning("Failed to parse game {}: {!r}".format(game_id, e))
+                counts['failed'] += 1
+                continue
+            counts['done'] += 1
+
+    def iter_records(self, record_type=None):
+        """
+        Stream the backfilled drive and/or play records of the season, one
+        game file at a time
+
+        Parameters
+        ----------
+        record_type : str (default None)
+            'drive' or 'play' to yield only that kind of record
+        """
+        for filename in sorted(os.listdir(self.games_dir)):
+            if not filename.endswith('.jsonl.gz'):
+                continue
+            for record in read_jsonl(os.path.join(self.games_dir, filename)):
+                if record_type is None or record['record_type'] == record_type:
+                    yield record
+
+    def run(self, pool=None, max_parse_workers=None):
+        """
+        Backfill the season, reusing `pool` for parsing if given
+        """
+        if pool is None:
+            with ProcessPoolExecutor(max_workers=max_parse_workers) as pool:
+                return self.run(pool)
+        logger.info("Running play-by-play backfill for {} season".format(self.year))
+        events = self.week_events(self.week_numbers(), pool)
+        counts = self.backfill_games(self.completed_games(events), pool)
+        counts['failed_weeks'] = self.failed_weeks
+        logger.info("Backfill for {}: {done} games done, {skipped} already "
+                    "checkpointed, {failed} failed; weeks failed: {failed_weeks}"
+                    .format(self.year, **counts))
+        return counts
+
+
+def backfill_seasons(years, base_data_dir='~/football/scrape_history/raw_data',
+                     max_fetch_workers=None, max_parse_workers=None,
+                     batch_size=50):
+    """
+    Backfill play-by-play for several seasons on one parse pool
+
+    Parameters
+    ----------
+    years : iterable of int
+        Seasons to backfill
+
+    base_data_dir : str
+        Directory holding one data directory per season
+
+    max_fetch_workers : int (default None)
+        Maximum number of requests in flight at once; defaults to
+        `fetch.max_concurrency` in the config
+
+    max_parse_workers : int (default None)
+        Number of processes parsing pages; defaults to the CPU count
+
+    batch_size : int (default 50)
+        Number of game pages fetched per batch
+
+    Returns
+    -------
+    counts : dict
+        Per-season game counts and failed weeks from `SeasonBackfill.run`,
+        keyed by year
+    """
+    counts = {}
+    with ProcessPoolExecutor(max_workers=max_parse_workers) as pool:
+        for year in years:
+            season = SeasonBackfill(year, base_data_dir, batch_size=batch_size,
+                                    max_fetch_workers=max_fetch_workers)
+            counts[year] = season.run(pool)
+    return counts
+
+
+if __name__ == '__main__':
+    import sys
+    assert len(sys.argv) > 1, 'No seasons provided'
+    years = [int(year) for year in sys.argv[1:]]
+
+    logger.info("Backfilling play-by-play for {}".format(years))
+    backfill_seasons(years)
+    logger.info("Backfill complete")
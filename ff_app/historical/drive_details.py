@@ -0,0 +1,178 @@
+"""
+Parses the drive-detail line of ESPN's play-by-play accordion, eg.
+
+    'Texas drive: 8 plays 75 yards, 3:21 Texas Touchdown, 7-0'
+
+into typed fields, one string at a time or a whole season at once
+"""
+from collections import namedtuple
+from enum import Enum
+from functools import lru_cache
+import importlib
+import re
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Everything after '<team> drive:' -- play count, optional penalty count,
+# yards (singular/plural, 'yds', possibly negative or 'net'), optional
+# penalty yards, m:ss drive time, then the result text
+DRIVE_TAIL_RE = re.compile(
+    r"\s*(\d+) plays?,?\s*"
+    r"(?:\((\d+) penalt(?:y|ies)\),?\s*)?"
+    r"(-?\d+)(?: net)? (?:yards?|yds?),?\s*"
+    r"(?:\(-?\d+ penalty yards?\),?\s*)?"
+    r"(\d*):(\d{2})\s*(.*)", re.DOTALL)
+
+# The common 'N plays N yards, m:ss ' tail, tried before DRIVE_TAIL_RE
+SIMPLE_TAIL_RE = re.compile(r" (\d+) plays? (-?\d+) yards?, (\d+):(\d\d) ")
+
+DriveDetails = namedtuple('DriveDetails', [
+    'drive_team', 'num_plays', 'num_yards', 'num_penalties',
+    'drive_seconds', 'drive_time', 'drive_result', 'result_text'])
+
+
+class DriveResult(Enum):
+    TOUCHDOWN = 'Touchdown'
+    FIELD_GOAL = 'Field Goal'
+    MISSED_FG = 'Missed FG'
+    BLOCKED_FG = 'Blocked FG'
+    PUNT = 'Punt'
+    BLOCKED_PUNT = 'Blocked Punt'
+    INTERCEPTION = 'Interception'
+    FUMBLE = 'Fumble'
+    DOWNS = 'Downs'
+    SAFETY = 'Safety'
+    END_OF_HALF = 'End of Half'
+    END_OF_GAME = 'End of Game'
+    OTHER = 'Other'
+
+    @classmethod
+    def from_text(cls, text):
+        """
+        Classify ESPN's result text (eg. 'Rushing TD', 'Missed Field Goal',
+        'Fumble Return Touchdown'); turnovers outrank the defensive score
+        that may follow them
+        """
+        return classify_result(text or '')
+
+
+# Checked in order, so the more specific results come first
+RESULT_PATTERNS = [(re.compile(pattern, re.IGNORECASE), result) for
+                   pattern, result in [
+    (r'\bblocked (?:fg|field goal)', DriveResult.BLOCKED_FG),
+    (r'\bblocked punt', DriveResult.BLOCKED_PUNT),
+    (r'\bmissed (?:fg|field goal)|\bfg missed', DriveResult.MISSED_FG),
+    (r'\binterception|\bint\b', DriveResult.INTERCEPTION),
+    (r'\bfumble', DriveResult.FUMBLE),
+    (r'\bsafety', DriveResult.SAFETY),
+    (r'\bpunt', DriveResult.PUNT),
+    (r'\bfield goal|\bfg\b', DriveResult.FIELD_GOAL),
+    (r'\btouchdown|\btd\b', DriveResult.TOUCHDOWN),
+    (r'\bdowns\b', DriveResult.DOWNS),
+    (r'\bend of (?:1st |first )?half|\bhalftime', DriveResult.END_OF_HALF),
+    (r'\bend of (?:game|4th quarter|regulation)', DriveResult.END_OF_GAME),
+]]
+
+
+@lru_cache(maxsize=None)
+def classify_result(text):
+    for pattern, result in RESULT_PATTERNS:
+        if pattern.search(text):
+            return result
+    return DriveResult.OTHER
+
+
+def parse_drive_details(summary_str):
+    """
+    Parse a single drive-detail string
+
+    Parameters
+    ----------
+    summary_str : str
+        Text of the drive's `drive-details` span
+
+    Returns
+    -------
+    details : DriveDetails or None
+        Typed drive fields, or None if the string is not a drive summary
+    """
+    team, sep, tail = (summary_str or '').partition(' drive:')
+    if not sep:
+        return None
+    match = SIMPLE_TAIL_RE.match(tail)
+    if match is not None:
+        plays, yards, minutes, seconds = match.groups()
+        penalties, rest = None, tail[match.end():]
+    else:
+        match = DRIVE_TAIL_RE.match(tail)
+        if match is None:
+            return None
+        plays, penalties, yards, minutes, seconds, rest = match.groups()
+    team = team.strip()
+    # The result repeats the team name and is followed by the score
+    if rest.startswith(team):
+        rest = rest[len(team):]
+    result_text = rest.split(',', 1)[0].strip()
+    minutes = minutes or '0'
+    return DriveDetails(team, int(plays), int(yards), int(penalties or 0),
+                        60 * int(minutes) + int(seconds),
+                        minutes + ':' + seconds,
+                        DriveResult.from_text(result_text), result_text)
+
+
+def parse_drive_details_many(summaries):
+    """
+    Parse an iterable of drive-detail strings
+
+    Returns
+    -------
+    details : list
+        DriveDetails (None for unparseable strings) in input order
+    """
+    return [parse_drive_details(summary_str) for summary_str in summaries]
+
+
+def drive_details_frame(summaries):
+    """
+    Parse a season's worth of drive-detail strings into a compact frame
+
+    Parameters
+    ----------
+    summaries : iterable of str
+        Drive-detail strings, eg. collected from every game of a season
+
+    Returns
+    -------
+    drive_df : pandas.DataFrame
+        One row per input string with the DriveDetails columns. Numeric
+        columns are nullable integers, and `drive_team` and `drive_result`
+        (the DriveResult name) are categoricals. Unparseable rows are
+        missing
+    """
+    pandas = importlib.import_module('pandas')
+    parsed = parse_drive_details_many(summaries)
+    missing = sum(details is None for details in parsed)
+    if missing:
+        logger.warning("%s of %s drive summaries could not be parsed",
+                       missing, len(parsed))
+
+    columns = list(zip(*[details or DriveDetails(*[None] * 8)
+                         for details in parsed])) \
+        or [()] * len(DriveDetails._fields)
+    data = dict(zip(DriveDetails._fields, columns))
+    drive_df = pandas.DataFrame({
+        'drive_team': pandas.Categorical(data['drive_team']),
+        'num_plays': pandas.array(data['num_plays'], dtype='Int16'),
+        'num_yards': pandas.array(data['num_yards'], dtype='Int16'),
+        'num_penalties': pandas.array(data['num_penalties'], dtype='Int8'),
+        'drive_seconds': pandas.array(data['drive_seconds'], dtype='Int16'),
+        'drive_time': pandas.array(data['drive_time'], dtype=object),
+        'drive_result': pandas.Categorical(
+            [r.name if r is not None else None
+             for r in data['drive_result']],
+            categories=[r.name for r in DriveResult]),
+        'result_text': pandas.Categorical(data['result_text']),
+    }, columns=list(DriveDetails._fields))
+    return drive_df
@@ -0,0 +1,83 @@
+"""
+Streaming JSON-lines files, gzip-compressed when the path ends in '.gz'
+
+Records are written one line at a time as they are produced, so writing
+a season of drives and plays never holds more than one record in memory.
+"""
+import gzip
+import json
+import os
+
+
+def _open(path, mode, compress=None):
+    if compress is None:
+        compress = path.endswith('.gz')
+    if compress:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class JsonlWriter():
+    """
+    Context manager writing records to a JSON-lines file
+
+    Parameters
+    ----------
+    path : str
+        Output path; gzip-compressed if it ends in '.gz'
+
+    append : bool (default False)
+        Indicator for whether records are appended to an existing file
+        (as a new gzip member for '.gz' paths). Otherwise the file is
+        written to a temporary path and only moved into place once the
+        writer closes without an error, so it is either complete or absent
+    """
+    def __init__(self, path, append=False):
+        self.path = path
+        self.append = append
+        self.write_path = path if append else '{}.tmp'.format(path)
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        self._file = _open(self.write_path, 'a' if self.append else 'w',
+                           compress=self.path.endswith('.gz'))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if self.append:
+            return
+        if exc_type is None:
+            os.replace(self.write_path, self.path)
+        else:
+            os.remove(self.write_path)
+
+    def write(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')))
+        self._file.write('\n')
+        self.count += 1
+
+    def write_many(self, records):
+        """
+        Write every record from an iterable, eg. a generator
+
+        Returns
+        -------
+        count : int
+            Number of records written by this call
+        """
+        start = self.count
+        for record in records:
+            self.write(record)
+        return self.count - start
+
+
+def read_jsonl(path):
+    """
+    Yield the records of a JSON-lines file one at a time
+    """
+    with _open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -1,17 +1,25 @@
 import os
 
-import requests
 import json
 import yaml
+from collections import OrderedDict, namedtuple
 from datetime import datetime
 import re
 
 from bs4 import BeautifulSoup as bs
 
+from .. import fetch
+from .drive_details import parse_drive_details
+
 import logging
 
 logger = logging.getLogger(__name__)
 
+GAME_URL = 'http://www.espn.com/college-football/playbyplay?gameId={game_id}'
+
+# Summary header link and play list of a single drive
+DriveNodes = namedtuple('DriveNodes', ['summary', 'plays'])
+
 
 class ScrapeGamePlays():
     """
@@ -21,18 +29,23 @@ class ScrapeGamePlays():
     ----------
     game_id : str
         ESPN-specific unique ID for a single game
+
+    request_instance : requests.Response (default None)
+        Already fetched play-by-play page; fetched from ESPN if not given
     """
-    def __init__(self, game_id):
+    def __init__(self, game_id, request_instance=None):
         self.game_id = game_id
         self.game_url = self.set_game_url(game_id)
-        self.request_data = self.request_data()
+        self._drive_index = None
+        self._drive_link_count = None
+        self.request_data = self.request_data(request_instance)
 
     def set_game_url(self, game_id):
-        return 'http://www.espn.com/college-football/playbyplay?gameId={game_id}'.format(game_id=game_id)
+        return GAME_URL.format(game_id=game_id)
 
     @property
     def request(self):
-        r = requests.get(self.game_url)
+        r = fetch.get_fetcher().get(self.game_url)
         return r
 
     def request_data(self, request_instance=None):
@@ -40,16 +53,62 @@ class ScrapeGamePlays():
         soup = bs(request.text, "html5lib")
         return soup
 
+    def index_drives(self):
+        """
+        Walk the page once and map each drive id, in page order, to the
+        summary link and play list of that drive. Only the first link and
+        panel carrying a given href/id are kept, as `find` would return.
+
+        Returns
+        -------
+        drive_index : OrderedDict
+            DriveNodes keyed by drive id
+        """
+        game_tag = re.compile('(gp-playbyplay-{}).*'.format(self.game_id))
+        drive_ids, links, panels = [], {}, {}
+        link_count = 0
+        for tag in self.request_data.find_all(["a", "div"]):
+            if tag.name == "a":
+                href = tag.get('href')
+                if href is None:
+                    continue
+                links.setdefault(href, tag)
+                if game_tag.search(href):
+                    link_count += 1
+                continue
+            if 'accordion-header' in tag.get('class', ()):
+                drive_ids.append(tag.find("a")['aria-controls'])
+            if tag.get('id') is not None:
+                panels.setdefault(tag['id'], tag)
+
+        drive_index = OrderedDict()
+        for drive_id in drive_ids:
+            panel = panels.get(drive_id)
+            drive_index[drive_id] = DriveNodes(
+                summary=links.get(drive_id),
+                plays=panel.find("ul", attrs={'class': 'drive-list'})
+                if panel is not None else None)
+        self._drive_link_count = link_count
+        return drive_index
+
+    @property
+    def drive_index(self):
+        if self._drive_index is None:
+            self._drive_index = self.index_drives()
+        return self._drive_index
+
     @property
     def number_of_drives(self):
-        soup = self.request_data
-        game_tag = re.compile('(gp-playbyplay-{}).*'.format(self.game_id))
-        return len(soup.find_all("a", attrs={'href': game_tag}))
+        if self._drive_link_count is None:
+            self._drive_index = self.index_drives()
+        return self._drive_link_count
 
     def get_drive_ids(self):
-        return [x.find("a")['aria-controls'] for x in self.request_data.find_all("div", class_='accordion-header')]
+        return list(self.drive_index)
 
     def get_raw_drive_summary(self, drive_id):
+        if drive_id in self.drive_index:
+            return self.drive_index[drive_id].summary
         return self.request_data.find("a", attrs={'href': drive_id})
 
     def drive_summary(self, drive_id):
@@ -59,32 +118,37 @@ class ScrapeGamePlays():
             s_dict['home_score'] = raw.find("span", class_="home").find("span", class_="team-score").text
             s_dict['away_score'] = raw.find("span", class_="away").find("span", class_="team-score").text
             summary_str = raw.find("span", class_="drive-details").text
-            s_dict['drive_team'] = summary_str.split(' drive')[0]
-            s_dict['num_plays'] = int(summary_str.split('drive: ')[1].split(' play')[0])
-            if 'plays' in summary_str:
-                s_dict['num_yards'] = int(summary_str.split('plays ')[1].split(' yard')[0])
-            else:
-                s_dict['num_yards'] = int(summary_str.split('play ')[1].split(' yard')[0])
-            if 'yards' in summary_str:
-                s_dict['drive_time'] = summary_str.split('yards, ')[1].split()[0]
-            else:
-                s_dict['drive_time'] = summary_str.split('yard, ')[1].split()[0]
-            s_dict['drive_result'] = summary_str.split(s_dict['drive_team'])[2].split(',')[0].strip()
+            details = parse_drive_details(summary_str)
+            if details is None:
+                logger.warning("Could not parse drive summary '{}'".format(summary_str))
+                s_dict['drive_details'] = summary_str
+                return s_dict
+            s_dict['drive_team'] = details.drive_team
+            s_dict['num_plays'] = details.num_plays
+            s_dict['num_yards'] = details.num_yards
+            s_dict['num_penalties'] = details.num_penalties
+            s_dict['drive_time'] = details.drive_time
+            s_dict['drive_seconds'] = details.drive_seconds
+            s_dict['drive_result'] = details.drive_result.value
+            s_dict['result_text'] = details.result_text
 
         return s_dict
 
     def get_raw_drive_plays(self, drive_id):
+        if drive_id in self.drive_index:
+            return self.drive_index[drive_id].plays
         return self.request_data.find("div", id=drive_id).find("ul", attrs={'class': 'drive-list'})
 
-    def drive_plays(self, drive_id):
+    def iter_drive_plays(self, drive_id):
         raw = self.get_raw_drive_plays(drive_id)
-        play_dict = {}
-        for i, play in enumerate(raw.find_all("li", attrs={'class': ''})):
-            play_dict[i] = {
+        for play in raw.find_all("li", attrs={'class': ''}):
+            yield {
                 'down_and_dist': play.find("h3").text,
                 'play_result': play.find("span").text.strip()
             }
-        return play_dict
+
+    def drive_plays(self, drive_id):
+        return dict(enumerate(self.iter_drive_plays(drive_id)))
 
     def drive(self, drive_id):
         drive = {'summary': self.drive_summary(drive_id),
@@ -96,3 +160,20 @@ class ScrapeGamePlays():
         for drive in self.get_drive_ids():
             all_drives_dict[drive] = self.drive(drive)
         return all_drives_dict
+
+    def iter_records(self):
+        """
+        Yield the game's drives and plays as flat records, one at a time
+        and in page order, instead of building the nested `all_drives`
+        dict. Every record carries 'record_type' ('drive' or 'play'),
+        'game_id', 'drive_id' and 'drive_num'; play records add 'play_num'
+        and drive records the fields of `drive_summary`.
+        """
+        for drive_num, drive_id in enumerate(self.get_drive_ids()):
+            keys = {'game_id': self.game_id, 'drive_id': drive_id,
+                    'drive_num': drive_num}
+            yield dict(record_type='drive', **keys,
+                       **self.drive_summary(drive_id))
+            for play_num, play in enumerate(self.iter_drive_plays(drive_id)):
+                yield dict(record_type='play', **keys, play_num=play_num,
+                           **play)
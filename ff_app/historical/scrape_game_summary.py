@@ -1,17 +1,34 @@
 import os
 
-import requests
 import json
 import yaml
 from datetime import datetime
 
 from bs4 import BeautifulSoup as bs
 
+from .. import cache, fetch
+from ..scrape_espn import find_embedded_json
+
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def parse_week_events(text):
+    """
+    Events embedded in a weekly scoreboard page, found with the regex
+    extractor and falling back to a full html5lib parse of the page
+    """
+    data = find_embedded_json(text, '"events"')
+    if isinstance(data, dict) and 'events' in data:
+        return data['events']
+    logger.info("Embedded events not found by fast extractor; falling back "
+                "to html5lib parse")
+    soup = bs(text, 'html5lib')
+    data = soup.select('script')[13].string.split('\t')[1].strip('= ').split(';window')[0]
+    return json.loads(data)['events']
+
+
 class ScrapeEspn():
     def __init__(self, year,
                  base_data_dir='~/football/scrape_history/raw_data'):
@@ -50,7 +67,7 @@ class ScrapeCalendar(ScrapeEspn):
     def scrape_cal(self):
         cal_url = self.summary_url.format(year=self.year, week=1)
         logger.info("Making GET request for {}".format(cal_url))
-        r = requests.get(cal_url)
+        r = fetch.get_fetcher().get(cal_url)
         soup = bs(r.text, 'html5lib')
         cal = soup.select('script')[13].string.split('\t')[1].strip('= ').split(';')[0]
         return json.loads(cal)['leagues'][0]['calendar'][0]
@@ -91,7 +108,7 @@ class ScrapeCalendar(ScrapeEspn):
 class ScrapeSummary(ScrapeEspn):
     def set_summary_dir(self, data_dir):
         summary_dir = os.path.join(data_dir, 'summary')
-        if os.path.exists(cal_dir) and os.path.isdir(summary_dir):
+        if os.path.exists(summary_dir) and os.path.isdir(summary_dir):
             logger.info("Setting summary directory: {}".format(summary_dir))
             return summary_dir
         else:
@@ -102,12 +119,15 @@ class ScrapeSummary(ScrapeEspn):
     def scrape_week_summary(self, week, return_raw_soup=False):
         summary_url = self.summary_url.format(year=self.year, week=week)
         logger.info("Making GET request for {}".format(summary_url))
-        r = requests.get(summary_url)
-        soup = bs(r.text, 'html5lib')
+        r = fetch.get_fetcher().get(summary_url)
         if return_raw_soup:
-            return soup
-        data = soup.select('script')[13].string.split('\t')[1].strip('= ').split(';window')[0]
-        return json.loads(data)['events']
+            return bs(r.text, 'html5lib')
+        events = parse_week_events(r.text)
+        status = [e.get('status', {}).get('type', {}) for e in events]
+        fetch.get_fetcher().set_ttl(summary_url, cache.ttl_for_games(
+            [s.get('completed') for s in status],
+            [s.get('state') == 'in' for s in status]))
+        return events
 
     def unpack_links(self, data):
         link_dict = {}
@@ -0,0 +1,209 @@
+"""
+Live-score watch mode. Polls the scoreboard for a single week on an
+adaptive interval, re-extracts only the score, clock and quarter of games
+that are not yet final, and pushes just the changed games to the
+'Game List' sheet.
+"""
+import time
+import logging
+
+import pandas as pd
+
+from . import data_prep, fetch, game_fields
+from .config import CONFIG
+from .scrape_espn import GetGameData
+
+
+LOGGER = logging.getLogger(__file__)
+
+LIVE_FIELDS = ('home_score', 'away_score', 'game_quarter', 'game_clock',
+               'game_started', 'game_complete')
+
+# Game List columns the live fields are written to
+LIVE_COLUMNS = {'home_score': 'Home Score',
+                'away_score': 'Away Score',
+                'game_quarter': 'Quarter',
+                'game_clock': 'Clock'}
+
+_ID_FIELDS = ('game_id', 'home_abbr', 'away_abbr', 'kickoff')
+
+extract_live_record = game_fields.compile_extractor(
+    [f for name in _ID_FIELDS + LIVE_FIELDS
+     for f in game_fields.GAME_FIELDS if f.name == name])
+
+
+def diff_games(previous, current, fields=LIVE_FIELDS):
+    """
+    Changed fields of each game between two polls
+
+    Parameters
+    ----------
+    previous : dict
+        Game records from the previous poll, keyed by game ID
+
+    current : dict
+        Game records from the latest poll, keyed by game ID
+
+    fields : sequence of str (default LIVE_FIELDS)
+        Fields to compare
+
+    Returns
+    -------
+    changes : dict
+        New values of the changed fields, keyed by game ID; games with no
+        changes are left out
+    """
+    changes = {}
+    for game_id, game in current.items():
+        old = previous.get(game_id, {})
+        changed = {f: game[f] for f in fields
+                   if f not in old or old[f] != game[f]}
+        if changed:
+            changes[game_id] = changed
+    return changes
+
+
+class LiveScoreWatcher():
+    """
+    Parameters
+    ----------
+    week_num : int or str
+        Week number within the season, or 'bowls'
+
+    year : int (default None)
+        Year for the season; defaults to the configured year
+
+    live_interval : float (default None)
+        Seconds between polls while any game is in progress; defaults to
+        `live.live_interval` in the config
+
+    idle_interval : float (default None)
+        Longest wait between polls while no game is in progress; the wait
+        is cut short for the next kickoff. Defaults to
+        `live.idle_interval` in the config
+
+    sheets_io : google_io.GoogleSheetsReadWrite (default None)
+        Client used to push changes to the 'Game List' sheet; changes are
+        only logged if not provided
+    """
+    def __init__(self, week_num, year=None, live_interval=None,
+                 idle_interval=None, sheets_io=None):
+        settings = CONFIG.get('live', {})
+        self.pull = GetGameData(week_num=week_num,
+                                year=year or CONFIG['games']['year'])
+        self.live_interval = live_interval \
+            or settings.get('live_interval', 30)
+        self.idle_interval = idle_interval \
+            or settings.get('idle_interval', 600)
+        self.sheets_io = sheets_io
+        self.games = {}
+        self._columns = _ID_FIELDS + LIVE_FIELDS
+
+    @property
+    def live_games(self):
+        return {i: g for i, g in self.games.items()
+                if g['game_started'] and not g['game_complete']}
+
+    @property
+    def finished(self):
+        return bool(self.games) \
+            and all(g['game_complete'] for g in self.games.values())
+
+    def poll(self):
+        """
+        Fetch the scoreboard once and return the changed fields of each
+        game since the previous poll (everything on the first poll).
+        Games already final are not re-extracted.
+        """
+        response = fetch.get_fetcher().get(self.pull.scrape_url,
+                                           revalidate=True)
+        data = self.pull.parse_request_data(response)
+        evts = data['page']['content']['scoreboard']['evts']
+
+        current = dict(self.games)
+        for game in evts:
+            known = self.games.get(game.get('id'))
+            if known is not None and known['game_complete']:
+                continue
+            record = dict(zip(self._columns, extract_live_record(game)))
+            current[record['game_id']] = record
+
+        changes = diff_games(self.games, current)
+        self.games = current
+        LOGGER.info("%s games in progress, %s changed since last poll",
+                    len(self.live_games), len(changes))
+        return changes
+
+    def next_interval(self):
+        """
+        Seconds until the next poll: `live_interval` while games are in
+        progress, otherwise until the next kickoff, capped at
+        `idle_interval`
+        """
+        if self.live_games:
+            return self.live_interval
+        now = time.time()
+        kickoffs = [g['kickoff'].timestamp() for g in self.games.values()
+                    if g['kickoff'] is not None and not g['game_started']
+                    and g['kickoff'].timestamp() > now]
+        if not kickoffs:
+            return self.idle_interval
+        return max(self.live_interval,
+                   min(self.idle_interval, min(kickoffs) - now))
+
+    def changes_frame(self, changes):
+        """
+        Game List rows for the changed games, keyed by week and home/away
+        team with the live columns formatted as strings
+        """
+        rows = []
+        for game_id in changes:
+            game = self.games[game_id]
+            row = {'Week': str(self.pull.week_num),
+                   'Home Abbr': game['home_abbr'],
+                   'Away Abbr': game['away_abbr']}
+            for field, column in LIVE_COLUMNS.items():
+                row[column] = '' if game[field] is None else str(game[field])
+            rows.append(row)
+        return pd.DataFrame(rows, columns=['Week', 'Home Abbr', 'Away Abbr']
+                            + list(LIVE_COLUMNS.values()))
+
+    def push(self, changes):
+        """
+        Write the changed games' live columns to the 'Game List' sheet.
+        Games not on the sheet (eg. without a spread) are skipped.
+        """
+        if not changes or self.sheets_io is None:
+            return {}
+        return self.sheets_io.sync({'Game List': self.changes_frame(changes)},
+                                   key=data_prep.game_keys, append_new=False)
+
+    def run(self, max_polls=None):
+        """
+        Poll and push until every game is final, or for `max_polls` polls
+        """
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            changes = self.poll()
+            self.push(changes)
+            polls += 1
+            if self.finished:
+                LOGGER.info("All games final; stopping live updates")
+                break
+            if max_polls is None or polls < max_polls:
+                interval = self.next_interval()
+                LOGGER.debug("Next poll in %.0f seconds", interval)
+                time.sleep(interval)
+        return self.games
+
+
+if __name__ == '__main__':
+    import sys
+    from . import google_io
+    assert len(sys.argv) > 1, 'No week number provided'
+    week_num = sys.argv[1]
+
+    LOGGER.info("Watching live scores for week %s", week_num)
+    with google_io.GoogleSheetsReadWrite() as io:
+        LiveScoreWatcher(week_num, sheets_io=io).run()
+    LOGGER.info("Live updates complete")
@@ -0,0 +1,281 @@
+"""
+Lightweight run instrumentation: timed spans around the stages of a run,
+counters (HTTP requests, bytes and retries, Sheets requests and cells
+written) and gauges, dumped per run as JSON or Prometheus text, plus an
+optional cProfile or tracemalloc hook
+
+Spans and counters are off unless `metrics.enabled` is set in the
+config, and profiling is switched on separately with `metrics.profile`.
+When disabled, `span` hands back one shared no-op context manager and
+`incr` returns at once, so instrumented code pays about one attribute
+check per call.
+"""
+import json
+import os
+import re
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime as dt
+
+from .config import CONFIG
+
+
+LOGGER = logging.getLogger(__file__)
+
+PROMETHEUS_PREFIX = 'ff_app'
+
+PROFILERS = ('cprofile', 'tracemalloc')
+
+_NAME_RE = re.compile('[^a-zA-Z0-9_]')
+
+
+class _NoopSpan():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span():
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record_span(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics():
+    """
+    Parameters
+    ----------
+    enabled : bool (default None)
+        Indicator for whether spans and counters are recorded; defaults
+        to `metrics.enabled` in the config, read on first use
+
+    profile : str (default None)
+        'cprofile' or 'tracemalloc' to profile the blocks wrapped in
+        `profile`; defaults to `metrics.profile` in the config
+    """
+    def __init__(self, enabled=None, profile=None):
+        self._enabled = enabled
+        self._profile = profile
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def enabled(self):
+        if self._enabled is None:
+            self._enabled = bool(self.settings.get('enabled', False))
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value):
+        self._enabled = value
+
+    @property
+    def settings(self):
+        return CONFIG.get('metrics') or {}
+
+    @property
+    def profiler(self):
+        profiler = self._profile or self.settings.get('profile')
+        if profiler and profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler '{profiler}'; expected one "
+                             f"of {PROFILERS}")
+        return profiler
+
+    def reset(self):
+        """
+        Clear everything recorded, eg. between runs in one process
+        """
+        with self._lock:
+            self.spans = {}
+            self.counters = {}
+            self.gauges = {}
+            self.started_at = dt.now()
+
+    def span(self, name):
+        """
+        Context manager timing a stage; repeated spans of the same name
+        accumulate their count, total and longest time
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name)
+
+    def record_span(self, name, seconds):
+        with self._lock:
+            count, total, longest = self.spans.get(name, (0, 0., 0.))
+            self.spans[name] = (count + 1, total + seconds,
+                                max(longest, seconds))
+
+    def merge(self, spans, counters):
+        """
+        Add spans and counters recorded elsewhere, eg. returned by a
+        worker process whose own metrics are lost with it
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            for name, (count, total, longest) in spans.items():
+                c, t, m = self.spans.get(name, (0, 0., 0.))
+                self.spans[name] = (c + count, t + total, max(m, longest))
+            for name, value in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def incr(self, name, value=1):
+        """
+        Add `value` to a counter, eg. incr('http_bytes', len(content))
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.gauges[name] = value
+
+    @contextmanager
+    def profile(self, name):
+        """
+        Profile the wrapped block with the configured profiler, writing
+        the result under the `metrics.profile_dir` directory (default
+        '<output>/metrics'): cProfile stats to '<name>.prof', or the
+        largest tracemalloc allocation sites to '<name>.tracemalloc.txt'
+        with the traced peak also kept as a gauge when metrics are
+        enabled. Does nothing if no profiler is configured.
+        """
+        profiler = self.profiler
+        if profiler is None:
+            yield
+            return
+        profile_dir = self._output_dir('profile_dir')
+        os.makedirs(profile_dir, exist_ok=True)
+
+        if profiler == 'cprofile':
+            import cProfile
+            prof = cProfile.Profile()
+            prof.enable()
+            try:
+                yield
+            finally:
+                prof.disable()
+                path = os.path.join(profile_dir, f'{name}.prof')
+                prof.dump_stats(path)
+                LOGGER.info("Saved cProfile stats for %s to '%s'", name, path)
+            return
+
+        import tracemalloc
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            top = tracemalloc.take_snapshot().statistics('lineno')[:25]
+            if started:
+                tracemalloc.stop()
+            self.set_gauge(f'{name}_peak_traced_bytes', peak)
+            path = os.path.join(profile_dir, f'{name}.tracemalloc.txt')
+            with open(path, 'w') as f:
+                f.write(f'Peak traced memory: {peak} bytes\n')
+                f.writelines(f'{stat}\n' for stat in top)
+            LOGGER.info("Saved tracemalloc report for %s to '%s'", name, path)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'started_at': self.started_at.isoformat(),
+                'spans': {name: {'count': count, 'seconds': round(total, 6),
+                                 'max_seconds': round(longest, 6)}
+                          for name, (count, total, longest)
+                          in self.spans.items()},
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """
+        Prometheus text exposition of the recorded metrics: stage times
+        and counts labelled by stage, and one series per counter and gauge
+        """
+        data = self.to_dict()
+        lines = []
+        if data['spans']:
+            for metric, field, kind in [
+                    ('stage_seconds_total', 'seconds', 'counter'),
+                    ('stage_calls_total', 'count', 'counter'),
+                    ('stage_max_seconds', 'max_seconds', 'gauge')]:
+                lines.append(f'# TYPE {prefix}_{metric} {kind}')
+                lines += [f'{prefix}_{metric}{{stage="{name}"}} {span[field]}'
+                          for name, span in data['spans'].items()]
+        for values, suffix, kind in [(data['counters'], '_total', 'counter'),
+                                     (data['gauges'], '', 'gauge')]:
+            for name, value in values.items():
+                metric = f"{prefix}_{_NAME_RE.sub('_', name)}{suffix}"
+                lines.append(f'# TYPE {metric} {kind}')
+                lines.append(f'{metric} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def _output_dir(self, setting):
+        return os.path.expanduser(
+            self.settings.get(setting)
+            or os.path.join(os.path.expanduser(CONFIG['output']), 'metrics'))
+
+    def dump(self, path=None, fmt=None):
+        """
+        Write the run's metrics to a file
+
+        Parameters
+        ----------
+        path : str (default None)
+            Output file; defaults to 'run-<start time>.json' (or '.prom')
+            under `metrics.output_dir` in the config, or '<output>/metrics'
+
+        fmt : str (default None)
+            'json' or 'prometheus'; defaults to `metrics.format` in the
+            config, or to 'prometheus' for paths ending in '.prom'
+
+        Returns
+        -------
+        path : str or None
+            File written, or None if metrics are disabled
+        """
+        if not self.enabled:
+            return None
+        fmt = fmt or ('prometheus' if path and path.endswith('.prom')
+                      else self.settings.get('format', 'json'))
+        if path is None:
+            path = os.path.join(
+                self._output_dir('output_dir'),
+                'run-{}.{}'.format(self.started_at.strftime('%Y%m%dT%H%M%S'),
+                                   'prom' if fmt == 'prometheus' else 'json'))
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(self.to_prometheus() if fmt == 'prometheus'
+                    else self.to_json())
+        LOGGER.info("Saved run metrics to '%s'", path)
+        return path
+
+
+METRICS = Metrics()
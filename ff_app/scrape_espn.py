@@ -1,19 +1,87 @@
 
 # import pandas
+import gzip
 import importlib
-import requests
 import json
-from bs4 import BeautifulSoup as bs
+import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime as dt
+from types import SimpleNamespace
 import logging
 
-from . import game_fields
+from . import cache, fetch, game_fields
 
 from .config import CONFIG
+from .metrics import METRICS
 
 
 LOGGER = logging.getLogger(__file__)
 
+# Matches the `window['...']=` (or older `window.espn.scoreboardData =`)
+# assignment that embeds the page's JSON payload
+WINDOW_ASSIGNMENT_RE = re.compile(
+    r"""window(?:\[(['"])[\w$]+\1\]|(?:\.[\w$]+)+)\s*=\s*(?=\{)""")
+JSON_DECODER = json.JSONDecoder()
+
+
+def find_embedded_json(text, marker):
+    """
+    Decode the first JSON object assigned to `window[...]` in a page's
+    text whose source contains `marker`, without building a DOM
+
+    Returns
+    -------
+    data : dict or None
+        Decoded payload, or None if no assignment holds the marker
+    """
+    for match in WINDOW_ASSIGNMENT_RE.finditer(text):
+        try:
+            data, end = JSON_DECODER.raw_decode(text, match.end())
+        except ValueError:
+            continue
+        if marker in text[match.end():end]:
+            return data
+    return None
+
+
+class ScoreboardSnapshot():
+    """
+    Single scrape of an ESPN scoreboard page, holding the raw response,
+    the parsed JSON payload and the game records extracted from it
+
+    Parameters
+    ----------
+    response : requests.Response
+        Response returned by the GET request for the scoreboard page
+
+    data : dict
+        JSON payload embedded in the scoreboard page
+
+    records : list of tuple
+        Extracted game records, one tuple per game in scoreboard order
+
+    columns : tuple of str (default game_fields.GAME_FIELD_NAMES)
+        Field names for each position in the game records
+    """
+    def __init__(self, response, data, records,
+                 columns=game_fields.GAME_FIELD_NAMES):
+        self.response = response
+        self.data = data
+        self.records = records
+        self.columns = columns
+        self.fetched_at = dt.now()
+        self._games = None
+
+    @property
+    def games(self):
+        if self._games is None:
+            self._games = {i: dict(zip(self.columns, record))
+                           for i, record in enumerate(self.records)}
+        return self._games
+
+    def filter_games(self, condition):
+        return {i: game for i, game in self.games.items() if condition(game)}
+
 
 class GetGameData():
     '''
@@ -26,6 +94,7 @@ class GetGameData():
     def __init__(self, week_num, year):
         self.week_num = week_num
         self.year = year
+        self._snapshot = None
         return
 
     # Bowl-specific URL
@@ -37,10 +106,48 @@ class GetGameData():
             url = CONFIG['games']['url']['inseason'].format(year=self.year, week=self.week_num)
         return url
 
+    @property
+    def snapshot(self):
+        if self._snapshot is None:
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self, request_instance=None):
+        """
+        Scrape the scoreboard page and replace the cached snapshot. All of
+        the game properties read from this snapshot until the next refresh.
+
+        Parameters
+        ----------
+        request_instance : requests.Response (default None)
+            Previously fetched scoreboard response to parse in place of
+            making a new GET request
+
+        Returns
+        -------
+        snapshot : ScoreboardSnapshot
+            Newly cached snapshot of the scoreboard page
+        """
+        with METRICS.span('fetch'):
+            request = request_instance \
+                or fetch.get_fetcher().get(self.scrape_url)
+        with METRICS.span('parse'):
+            data = self.parse_request_data(request)
+        with METRICS.span('extract'):
+            records = self.parse_games(data)
+        self._snapshot = ScoreboardSnapshot(request, data, records)
+        if request_instance is None:
+            games = self._snapshot.games.values()
+            fetch.get_fetcher().set_ttl(self.scrape_url, cache.ttl_for_games(
+                [g['game_complete'] for g in games],
+                [g['game_started'] for g in games]))
+        LOGGER.debug("Refreshed scoreboard snapshot for week %s in %s",
+                     self.week_num, self.year)
+        return self._snapshot
+
     @property
     def request(self):
-        r = requests.get(self.scrape_url)
-        return r
+        return self.snapshot.response
 
     def find_script_index(self, soup_scripts):
         for i, s in enumerate(soup_scripts):
@@ -50,9 +157,34 @@ class GetGameData():
             return 13
 
     @property
-    def request_data(self, request_instance=None):
-        request = request_instance or self.request
-        soup = bs(request.text, "html5lib")
+    def request_data(self):
+        return self.snapshot.data
+
+    def parse_request_data(self, request):
+        """
+        Extract the JSON payload embedded in the scoreboard page, using the
+        regex extractor and falling back to a full html5lib parse of the
+        page if no payload is found that way
+        """
+        data = self.fast_parse_request_data(request)
+        if data is None:
+            LOGGER.info("Embedded payload not found by fast extractor; "
+                        "falling back to html5lib parse")
+            METRICS.incr('html5lib_parses')
+            data = self.soup_parse_request_data(request)
+        return data
+
+    def fast_parse_request_data(self, request):
+        """
+        Decode the JSON assigned to `window[...]` in the page text without
+        building a DOM. Returns None if no game payload can be decoded.
+        """
+        return find_embedded_json(request.text, 'competitions')
+
+    def soup_parse_request_data(self, request):
+        # bs4/html5lib are only needed when the fast path misses
+        bs4 = importlib.import_module('bs4')
+        soup = bs4.BeautifulSoup(request.text, "html5lib")
         soup_scripts = soup.select('script')
         s_index = self.find_script_index(soup_scripts)
         score_data = (
@@ -67,59 +199,25 @@ class GetGameData():
         return json.loads(score_data)
 
     def save_data_to_file(self, data, filename):
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=4)
+        # Compact separators, and gzip for '.gz' filenames, keep season
+        # payloads small on disk
+        opener = gzip.open if filename.endswith('.gz') else open
+        with opener(filename, 'wt') as f:
+            json.dump(data, f, separators=(',', ':'))
 
         return None
 
     @property
-    def all_games_dict(self, request_data=None):
-        data = request_data or self.request_data
+    def all_games_dict(self):
+        return self.snapshot.games
 
+    def parse_games(self, data):
         games = data['page']['content']['scoreboard']['evts']
-
-        game_dict = {}
-        for i, game in enumerate(games):
-            game_info = {'date': game_fields.get_game_date(game),
-                         'time': game_fields.get_game_time(game),
-                         'networks': str(game_fields.get_game_networks(game)).replace('u', '').strip('[]').replace("'", "").replace('ABC, ESPN3', 'ABC'),
-                         'home_team': game_fields.get_home_team(game),
-                         'home_abbr': game_fields.get_home_abbr(game),
-                         'away_team': game_fields.get_away_team(game),
-                         'away_abbr': game_fields.get_away_abbr(game),
-                         'has_odds': game_fields.has_odds(game),
-                         'odds_provider': game_fields.get_game_odds_provider(game),
-                         'odds_line': game_fields.get_game_odds_line(game),
-                         'odds_line_fav': game_fields.parse_game_odds_line(game_fields.get_game_odds_line(game))[0],
-                         'odds_line_spread': game_fields.parse_game_odds_line(game_fields.get_game_odds_line(game))[1],
-                         'odds_ou': game_fields.parse_game_odds_ou(game),
-                         'neutral_site': game_fields.get_neutral_site_ind(game),
-                         'weather_conditions': game_fields.get_game_weather_conditions(game),
-                         'weather_temp_type': game_fields.get_game_weather_temp(game)[0],
-                         'weather_temp_value': game_fields.get_game_weather_temp(game)[1],
-                         'venue_name': game_fields.get_venue_name(game),
-                         'venue_city': game_fields.get_venue_city(game),
-                         'venue_state': game_fields.get_venue_state(game),
-                         'venue_city_state': game_fields.get_venue_city(game) + ', ' + game_fields.get_venue_state(game),
-                         'home_record': game_fields.get_home_record(game),
-                         'away_record': game_fields.get_away_record(game),
-                         'conf_game_ind': game_fields.get_conf_game_ind(game),
-                         'home_score': game_fields.get_home_score(game),
-                         'away_score': game_fields.get_away_score(game),
-                         'home_rank': game_fields.get_home_rank(game),
-                         'away_rank': game_fields.get_away_rank(game),
-                         'game_started': game_fields.get_game_started(game),
-                         'game_complete': game_fields.get_game_finish(game),
-                         'game_quarter': game_fields.get_game_quarter(game),
-                         'game_clock': game_fields.get_game_clock(game)
-                         }
-            game_dict[i] = game_info
-
-        return game_dict
+        return [game_fields.extract_game_record(game) for game in games]
 
     @property
-    def game_data_dict(self, game_dict=None):
-        games = game_dict or self.all_games_dict
+    def game_data_dict(self):
+        games = self.all_games_dict
         return games
         # odds_games = {}
         # for i in games:
@@ -128,35 +226,160 @@ class GetGameData():
         # return odds_games
 
     @property
-    def game_dict_completed(self, game_dict=None):
-        games = game_dict or self.game_data_dict
-        completed_games = {}
-        for i in games:
-            if games[i]['game_complete']:
-                completed_games[i] = games[i]
-        return completed_games
+    def game_dict_completed(self):
+        return self.snapshot.filter_games(lambda g: g['game_complete'])
 
     @property
-    def game_dict_inprogress(self, game_dict=None):
-        games = game_dict or self.game_data_dict
-        inprogress_games = {}
-        for i in games:
-            if games[i]['game_started']:
-                inprogress_games[i] = games[i]
-        return inprogress_games
+    def game_dict_inprogress(self):
+        return self.snapshot.filter_games(lambda g: g['game_started'])
 
     @property
-    def game_dict_upcoming(self, game_dict=None):
-        games = game_dict or self.game_data_dict
-        upcoming_games = {}
-        for i in games:
-            if (not games[i]['game_started']) and (not games[i]['game_complete']):
-                upcoming_games[i] = games[i]
-        return upcoming_games
+    def game_dict_upcoming(self):
+        return self.snapshot.filter_games(
+            lambda g: (not g['game_started']) and (not g['game_complete']))
 
     @property
-    def game_data_df(self, game_dict=None):
-        pandas = importlib.import_module('pandas')
-        games = game_dict or self.game_data_dict
-        game_df = pandas.DataFrame.from_dict(games, orient='index')
+    def game_data_df(self):
+        return build_game_frame(self.snapshot.records, self.snapshot.columns)
+
+
+def _schema_column(pandas, values, dtype):
+    """
+    Column of game record values converted to the schema dtype, with the
+    '' placeholders used by the field getters treated as missing
+    """
+    values = [None if v == '' else v for v in values]
+    if dtype.startswith('datetime64'):
+        col = pandas.to_datetime(pandas.Series(values, dtype=object))
+        if col.dt.tz is None and ', ' in dtype:
+            col = col.dt.tz_localize(dtype.split(', ')[1].rstrip(']'))
+        return col.astype(dtype)
+    if dtype.startswith('float'):
+        return pandas.to_numeric(pandas.Series(values, dtype=object),
+                                 errors='coerce').astype(dtype)
+    if dtype.startswith('Int'):
+        return pandas.to_numeric(pandas.Series(values, dtype=object),
+                                 errors='coerce').round().astype(dtype)
+    return pandas.Series(values, dtype=dtype)
+
+
+def build_game_frame(records, columns=game_fields.GAME_FIELD_NAMES):
+    """
+    Build a game frame column by column from extracted game records,
+    using the dtypes in `game_fields.GAME_SCHEMA`: categorical team, venue
+    and network columns, nullable integer ranks and scores, float32
+    spreads and totals, and datetime dates and kickoffs
+
+    Parameters
+    ----------
+    records : list of tuple
+        Game records, as produced by `game_fields.extract_game_record`
+
+    columns : tuple of str (default game_fields.GAME_FIELD_NAMES)
+        Field names for each position in the records
+
+    Returns
+    -------
+    game_df : pandas.DataFrame
+        Typed dataframe with one row per game
+    """
+    pandas = importlib.import_module('pandas')
+    values = list(zip(*records)) if records else [()] * len(columns)
+    data = {}
+    for name, col in zip(columns, values):
+        dtype = game_fields.GAME_SCHEMA.get(name)
+        data[name] = _schema_column(pandas, col, dtype) if dtype \
+            else pandas.Series(col, dtype=object)
+    return pandas.DataFrame(data, columns=list(columns))
+
+
+def parse_scoreboard_text(text, record_metrics=False):
+    """
+    Extract the game records from the HTML text of a scoreboard page;
+    a top-level function so it can run on a process pool. The worker's
+    own metrics die with it, so the spans and counters recorded while
+    parsing (eg. 'html5lib_parses') are returned for the parent to merge
+
+    Returns
+    -------
+    records : list of tuple
+        Game records of the page
+
+    spans, counters : dict
+        Metrics recorded while parsing, empty unless `record_metrics`
+    """
+    METRICS.enabled = record_metrics
+    METRICS.reset()
+    pull = GetGameData(week_num=None, year=None)
+    records = pull.refresh(SimpleNamespace(text=text)).records
+    return records, METRICS.spans, METRICS.counters
+
+
+def pull_games(week_years, max_fetch_workers=None, max_parse_workers=None):
+    """
+    Pull the scoreboards for many weeks and seasons at once. Pages are
+    fetched concurrently through the shared Fetcher, which applies the
+    configured rate limit, and parsed on a process pool. As with a single
+    week's refresh, each page's cache lifetime is set from the status of
+    its games, and the workers' parse metrics are merged into METRICS.
+
+    Parameters
+    ----------
+    week_years : iterable of tuple
+        (year, week) pairs to pull, where week is a week number or 'bowls'
+
+    max_fetch_workers : int (default None)
+        Maximum number of scoreboard requests in flight at once; defaults
+        to `fetch.max_concurrency` in the config
+
+    max_parse_workers : int (default None)
+        Number of processes parsing pages; defaults to the CPU count
+
+    Returns
+    -------
+    game_df : pandas.DataFrame
+        Dataframe of all games pulled, with 'year' and 'week' columns
+        identifying the scoreboard each came from; empty, with the same
+        columns, if no weeks are given
+    """
+    pandas = importlib.import_module('pandas')
+    week_years = list(dict.fromkeys(week_years))
+    if not week_years:
+        game_df = build_game_frame([])
+        game_df.insert(0, 'week', pandas.Series([], dtype=object))
+        game_df.insert(0, 'year', pandas.Series([], dtype='int64'))
         return game_df
+    urls = [GetGameData(week_num=week, year=year).scrape_url
+            for year, week in week_years]
+    LOGGER.info("Fetching %s scoreboards", len(urls))
+    responses = fetch.fetch_many(urls, max_workers=max_fetch_workers)
+
+    with ProcessPoolExecutor(max_workers=max_parse_workers) as pool:
+        parsed = list(pool.map(parse_scoreboard_text,
+                               [r.text for r in responses],
+                               [METRICS.enabled] * len(responses)))
+
+    all_records = []
+    fields = game_fields.GAME_FIELD_NAMES
+    complete = fields.index('game_complete')
+    started = fields.index('game_started')
+    for url, (records, spans, counters) in zip(urls, parsed):
+        METRICS.merge(spans, counters)
+        fetch.get_fetcher().set_ttl(url, cache.ttl_for_games(
+            [r[complete] for r in records], [r[started] for r in records]))
+        all_records.append(records)
+
+    frames = []
+    for (year, week), records in zip(week_years, all_records):
+        df = build_game_frame(records)
+        df.insert(0, 'week', week)
+        df.insert(0, 'year', year)
+        frames.append(df)
+    LOGGER.info("Pulled %s games across %s scoreboards",
+                sum(len(df) for df in frames), len(frames))
+    game_df = pandas.concat(frames, ignore_index=True)
+    # Categories differ between weeks, so re-encode after the concat
+    for col, dtype in game_fields.GAME_SCHEMA.items():
+        if dtype == 'category':
+            game_df[col] = game_df[col].astype('category')
+    return game_df
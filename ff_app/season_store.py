@@ -0,0 +1,183 @@
+"""
+Columnar season store. Each table (scraped games, picks view, game list)
+is kept as Parquet files partitioned by year and week, so weeks can be
+appended independently and reads only touch the partitions, columns and
+row groups they need, with the dtypes produced by the scraper intact.
+"""
+import os
+import shutil
+import logging
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+from .config import CONFIG
+
+
+LOGGER = logging.getLogger(__file__)
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('year', pa.int32()), ('week', pa.string())]), flavor='hive')
+
+# Column pairs identifying the teams in a game, in the order checked
+TEAM_COLUMNS = [('home_abbr', 'away_abbr'),
+                ('Home Abbr', 'Away Abbr'),
+                ('Favorite', 'Underdog')]
+
+
+def _coerce_column(col):
+    """
+    Arrow-compatible version of a column: object columns mixing numbers
+    with '' placeholders become numeric, other mixed columns become strings
+    """
+    try:
+        pa.array(col, from_pandas=True)
+        return col
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    try:
+        return pd.to_numeric(col.replace('', None))
+    except (TypeError, ValueError):
+        return col.map(lambda v: v if v is None or pd.isna(v) else str(v))
+
+
+def to_arrow(df):
+    """
+    Convert a game frame to an Arrow table, coercing mixed-type columns
+    """
+    df = df.reset_index(drop=True)
+    return pa.Table.from_pandas(
+        df.apply(_coerce_column), preserve_index=False)
+
+
+class SeasonStore():
+    """
+    Parameters
+    ----------
+    root : str (default None)
+        Directory holding the store; defaults to 'store' under the
+        configured output directory
+    """
+    def __init__(self, root=None):
+        self.root = os.path.expanduser(
+            root or os.path.join(CONFIG['output'], 'store'))
+        self.filesystem = fs.LocalFileSystem(use_mmap=True)
+
+    def partition_dir(self, table, year, week):
+        return os.path.join(self.root, table, f'year={int(year)}',
+                            f'week={week}')
+
+    def append_week(self, table, df, year, week):
+        """
+        Write one week of a table, replacing that week if it was already
+        stored so reruns do not duplicate games
+
+        Parameters
+        ----------
+        table : str
+            Table name, eg. 'games', 'picks' or 'game_list'
+
+        df : pandas.DataFrame
+            Data for the week; any 'year' / 'week' columns are replaced by
+            the partition values
+
+        year : int
+            Season year
+
+        week : int or str
+            Week number, or 'bowls'
+
+        Returns
+        -------
+        path : str
+            Path of the Parquet file written
+        """
+        data = to_arrow(df.drop(columns=['year', 'week'], errors='ignore'))
+        part_dir = self.partition_dir(table, year, week)
+        tmp_dir = part_dir + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        pq.write_table(data, os.path.join(tmp_dir, 'part-0.parquet'))
+        # Move the stored week aside rather than deleting it first, so a
+        # failed swap leaves it in place
+        old_dir = part_dir + '.old'
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(part_dir):
+            os.replace(part_dir, old_dir)
+        try:
+            os.replace(tmp_dir, part_dir)
+        except OSError:
+            if os.path.exists(old_dir):
+                os.replace(old_dir, part_dir)
+            raise
+        shutil.rmtree(old_dir, ignore_errors=True)
+        LOGGER.info("Stored %s rows of '%s' for week %s in %s",
+                    data.num_rows, table, week, year)
+        return os.path.join(part_dir, 'part-0.parquet')
+
+    def dataset(self, table):
+        """
+        Arrow dataset over every stored week of a table, with the schemas
+        of all weeks unified
+        """
+        table_dir = os.path.join(self.root, table)
+        files = [os.path.join(d, f)
+                 for d, _, names in os.walk(table_dir)
+                 for f in names if f.endswith('.parquet')
+                 and not d.endswith(('.tmp', '.old'))]
+        if not files:
+            raise FileNotFoundError(f"No data stored for table '{table}'")
+        schema = pa.unify_schemas(
+            [pq.read_schema(f, memory_map=True) for f in files]
+            + [PARTITIONING.schema], promote_options='permissive')
+        return ds.dataset(files, schema=schema, format='parquet',
+                          partitioning=PARTITIONING,
+                          partition_base_dir=table_dir,
+                          filesystem=self.filesystem)
+
+    def read(self, table, years=None, weeks=None, teams=None, columns=None):
+        """
+        Read a table into a DataFrame, pushing the year, week and team
+        filters down to the stored files
+
+        Parameters
+        ----------
+        table : str
+            Table name, eg. 'games', 'picks' or 'game_list'
+
+        years : list of int (default None)
+            Seasons to read; all if None
+
+        weeks : list of int or str (default None)
+            Weeks to read; all if None
+
+        teams : list of str (default None)
+            Team abbreviations; only games involving one of them are read
+
+        columns : list of str (default None)
+            Columns to read; all if None
+
+        Returns
+        -------
+        df : pandas.DataFrame
+            Matching rows, with 'year' and 'week' columns
+        """
+        dataset = self.dataset(table)
+        expr = None
+        if years is not None:
+            expr = ds.field('year').isin([int(y) for y in years])
+        if weeks is not None:
+            e = ds.field('week').isin([str(w) for w in weeks])
+            expr = e if expr is None else expr & e
+        if teams is not None:
+            names = dataset.schema.names
+            home, away = next(pair for pair in TEAM_COLUMNS
+                              if all(c in names for c in pair))
+            e = ds.field(home).isin(list(teams)) \
+                | ds.field(away).isin(list(teams))
+            expr = e if expr is None else expr & e
+        result = dataset.to_table(columns=columns, filter=expr)
+        return result.to_pandas()
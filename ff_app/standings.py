@@ -0,0 +1,297 @@
+"""
+Season leaderboard kept as running per-player, per-week records
+
+Each graded game is stored with the state its outcomes were graded from
+(final or not, result against the spread, mandatory flag), the side each
+player took and every player's outcome. An update only grades games whose
+state or picks changed, ie. games that went final, had a correction that
+flipped the result, or had a pick edited or a player added since, and
+applies the difference between their new and stored outcomes to the
+records. Updates cost O(changed games x players) rather than a regrade
+of the season, and the store is persisted as JSON between runs.
+"""
+import json
+import os
+import logging
+
+import numpy as np
+import pandas as pd
+
+from . import grading
+from .config import CONFIG
+from .data_prep import game_keys
+
+
+LOGGER = logging.getLogger(__file__)
+
+RECORD_COLUMNS = ['Wins', 'Losses', 'Pushes', 'No Pick', 'Mandatory Wins',
+                  'Mandatory Losses']
+
+
+def record_counts(outcomes, mandatory):
+    """
+    Players x RECORD_COLUMNS counts of an outcome matrix
+
+    Parameters
+    ----------
+    outcomes : numpy.ndarray
+        Players x games outcome codes, as from `grading.grade_picks`
+
+    mandatory : numpy.ndarray
+        Boolean indicator for the 'Mandatory' games among the columns
+    """
+    return np.column_stack([
+        (outcomes == grading.COVER).sum(axis=1),
+        (outcomes == grading.LOSS).sum(axis=1),
+        (outcomes == grading.PUSH).sum(axis=1),
+        (outcomes == grading.NO_PICK).sum(axis=1),
+        (outcomes[:, mandatory] == grading.COVER).sum(axis=1),
+        (outcomes[:, mandatory] == grading.LOSS).sum(axis=1),
+    ]).astype(np.int64)
+
+
+class StandingsStore():
+    """
+    Parameters
+    ----------
+    path : str (default None)
+        JSON file the standings are loaded from and saved to. If None,
+        the standings only live in memory
+    """
+    def __init__(self, path=None):
+        self.path = os.path.expanduser(path) if path else None
+        self.players = []
+        self.weeks = {}
+        self.games = {}
+        self._dirty = False
+        if self.path and os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.players = data.get('players', [])
+            self.weeks = data.get('weeks', {})
+            self.games = data.get('games', {})
+
+    @classmethod
+    def from_config(cls, year=None):
+        """
+        Standings saved at `standings.path` in the config, or
+        '<year>/standings.json' under the `output` directory by default
+        """
+        year = year or CONFIG['games']['year']
+        path = (CONFIG.get('standings') or {}).get('path') \
+            or os.path.join(os.path.expanduser(CONFIG['output']), str(year),
+                            'standings.json')
+        return cls(path.format(year=year))
+
+    @staticmethod
+    def game_states(lines, results):
+        """
+        Grading state of each game: [final, result against the spread,
+        mandatory], as ints
+
+        Returns
+        -------
+        keys : pandas.Series
+            Game key of each row of `lines`
+
+        states : list of list
+            State of each game
+        """
+        cover, complete = grading.cover_vector(lines, results)
+        mandatory = lines['Mandatory'].to_numpy() == 'Y'
+        states = np.column_stack([complete, cover, mandatory]).astype(int)
+        return game_keys(lines), states.tolist()
+
+    def changed_games(self, lines, results):
+        """
+        Boolean indicator for the games of `lines` whose stored outcomes
+        are out of date: games newly final, and graded games whose result
+        or finality changed since
+        """
+        keys, states = self.game_states(lines, results)
+        return np.array([
+            state != self.games[key]['state'] if key in self.games
+            else bool(state[0])
+            for key, state in zip(keys, states)], dtype=bool)
+
+    def graded_games(self, lines):
+        """
+        Boolean indicator for the games of `lines` with stored outcomes,
+        ie. final games whose picks may have been edited since
+        """
+        return np.array([key in self.games for key in game_keys(lines)],
+                        dtype=bool)
+
+    def changed_picks(self, lines, sides, players):
+        """
+        Boolean indicator for the graded games of `lines` where any of
+        `players` took a different side than the one stored, including
+        players the game was not graded for yet
+
+        Parameters
+        ----------
+        lines : pandas.DataFrame
+            Picks view of the games
+
+        sides : numpy.ndarray
+            Side each of `players` took in each game, as from
+            `grading.pick_matrix`
+
+        players : list of str
+            Players of the rows of `sides`
+        """
+        rows = [self.players.index(p) if p in self.players else None
+                for p in players]
+        changed = np.zeros(len(lines), dtype=bool)
+        for col, key in enumerate(game_keys(lines)):
+            game = self.games.get(key)
+            if game is None:
+                continue
+            stored = game.get('sides', [])
+            changed[col] = any(
+                row is None or row >= len(stored)
+                or stored[row] != side
+                for row, side in zip(rows, sides[:, col].tolist()))
+        return changed
+
+    def _stored_outcomes(self, keys):
+        """
+        Players x games matrix of the stored outcomes of `keys`, PENDING
+        for games or players not graded yet
+        """
+        outcomes = np.full((len(self.players), len(keys)), grading.PENDING,
+                           dtype=np.int8)
+        for col, key in enumerate(keys):
+            stored = self.games.get(key, {}).get('outcomes', [])
+            outcomes[:len(stored), col] = stored
+        return outcomes
+
+    def update(self, lines, results, player_picks,
+               pick_column=grading.PICK_COLUMN, missed_mandatory_loss=None):
+        """
+        Grade the games whose state or picks changed and apply the
+        difference to each player's weekly record. Pick edits are found
+        among the games of `lines`, so edits to an earlier week are
+        applied the next time that week is updated
+
+        Parameters
+        ----------
+        lines : pandas.DataFrame
+            Picks view of the games, for one or many weeks
+
+        results : pandas.DataFrame
+            Scoreboard games with scores and completion and a week
+            column; see `grading.cover_vector`
+
+        player_picks : dict
+            Each player's picks keyed by player name; see
+            `grading.pick_matrix`. Players missing from it keep their
+            stored outcomes
+
+        pick_column : str (default 'Pick')
+            Column of the players' sheets holding the team picked
+
+        missed_mandatory_loss : bool (default None)
+            See `grading.grade_picks`
+
+        Returns
+        -------
+        changed : list of str
+            Game keys that were regraded
+        """
+        sides = grading.pick_matrix(lines, player_picks, pick_column,
+                                    warn_unmatched=False)
+        changed = self.changed_games(lines, results) \
+            | self.changed_picks(lines, sides, list(player_picks))
+        if not changed.any():
+            LOGGER.info("No games or picks changed since the standings "
+                        "were updated")
+            return []
+        lines = lines[changed]
+        sides = sides[:, changed]
+        keys, states = self.game_states(lines, results)
+        keys = keys.tolist()
+
+        for player in player_picks:
+            if player not in self.players:
+                self.players.append(player)
+        old = self._stored_outcomes(keys)
+        graded = grading.grade_picks(lines, results, player_picks,
+                                     pick_column, missed_mandatory_loss,
+                                     warn_unmatched=False)
+        new = old.copy()
+        rows = [self.players.index(player) for player in graded.index]
+        new[rows] = graded.to_numpy()
+
+        mandatory = np.array([state[2] for state in states], dtype=bool)
+        weeks = lines['Week'].astype(str).to_numpy()
+        for week in np.unique(weeks):
+            cols = weeks == week
+            delta = record_counts(new[:, cols], mandatory[cols]) \
+                - record_counts(old[:, cols], mandatory[cols])
+            records = self.weeks.setdefault(week, {})
+            for player, counts in zip(self.players, delta.tolist()):
+                record = records.setdefault(player, [0] * len(RECORD_COLUMNS))
+                records[player] = [a + b for a, b in zip(record, counts)]
+
+        for col, (key, state, week) in enumerate(zip(keys, states, weeks)):
+            if state[0]:
+                # Sides of players missing from `player_picks` are kept,
+                # or None if never graded, so they are regraded once seen
+                stored = self.games.get(key, {}).get('sides', [])
+                game_sides = stored + [None] * (len(self.players) - len(stored))
+                for row, side in zip(rows, sides[:, col].tolist()):
+                    game_sides[row] = side
+                self.games[key] = {'week': week, 'state': state,
+                                   'sides': game_sides,
+                                   'outcomes': new[:, col].tolist()}
+            else:
+                self.games.pop(key, None)
+        self._dirty = True
+        LOGGER.info("Applied %s changed games to the standings of %s "
+                    "players", len(keys), len(self.players))
+        return keys
+
+    def leaderboard(self, weeks=None):
+        """
+        Season record of each player, best record first
+
+        Parameters
+        ----------
+        weeks : list (default None)
+            Weeks to total; all weeks if None
+
+        Returns
+        -------
+        leaderboard : pandas.DataFrame
+            RECORD_COLUMNS and the win percentage of decided picks per
+            player, as from `grading.grade_summary`
+        """
+        weeks = self.weeks if weeks is None else [str(w) for w in weeks]
+        totals = np.zeros((len(self.players), len(RECORD_COLUMNS)),
+                          dtype=np.int64)
+        for week in weeks:
+            for row, player in enumerate(self.players):
+                totals[row] += self.weeks.get(week, {}).get(
+                    player, [0] * len(RECORD_COLUMNS))
+        board = pd.DataFrame(totals, index=self.players,
+                             columns=RECORD_COLUMNS)
+        decided = board['Wins'] + board['Losses']
+        board['Win Pct'] = (board['Wins'] / decided.where(decided > 0)) \
+            .round(3)
+        return board.sort_values(['Wins', 'Win Pct'], ascending=False)
+
+    def save(self):
+        """
+        Write the standings to their path if they changed since they were
+        loaded or last saved
+        """
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'players': self.players, 'weeks': self.weeks,
+                       'games': self.games}, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -0,0 +1,237 @@
+"""
+Resolves the team tokens used in odds lines (eg. 'KANSASST' in
+'KANSASST -3.5') to the team abbreviations on the scoreboard
+
+The index maps normalized aliases to abbreviations for O(1) lookups. It
+learns team names and abbreviations from scraped games. Tokens it has
+not seen are matched fuzzily against the two teams of the game; confident
+matches are learned and persisted as a JSON file for later runs, while
+weaker ones are used for the run only and logged for review.
+"""
+from difflib import SequenceMatcher
+import json
+import os
+import re
+import unicodedata
+import logging
+
+import numpy as np
+
+from .config import CONFIG
+
+
+LOGGER = logging.getLogger(__file__)
+
+# Odds-line tokens observed to differ from the scoreboard abbreviation
+SEED_ALIASES = {
+    'COASTALCAR': 'CCU',    # Observed 2022 Week 1
+    'KANSASST': 'KSU',      # 2022 Week 2
+    'MICHIGANST': 'MSU',
+    'ULLAFAYTTE': 'UL',
+    'OKLAST': 'OKST',
+    'OREGONST': 'ORST',
+    'MISSSTATE': 'MSST',
+    'GATECH': 'GT'
+}
+
+NON_ALPHANUMERIC_RE = re.compile('[^A-Z0-9]')
+
+
+def normalize(token):
+    """
+    Uppercase alphanumeric form of a team token or name, with accents
+    removed, eg. 'San José State' -> 'SANJOSESTATE'
+    """
+    ascii_token = unicodedata.normalize('NFKD', str(token)) \
+        .encode('ascii', 'ignore').decode()
+    return NON_ALPHANUMERIC_RE.sub('', ascii_token.upper())
+
+
+def _is_subsequence(token, name):
+    remaining = iter(name)
+    return all(char in remaining for char in token)
+
+
+class TeamAliasIndex():
+    """
+    Parameters
+    ----------
+    path : str (default None)
+        JSON file the index is loaded from and saved to. If None, the
+        index only lives in memory, starting from the seed aliases
+
+    min_ratio : float (default 0.5)
+        Minimum similarity for a fuzzy match that is not an in-order
+        subsequence of a team's name
+
+    learn_ratio : float (default 0.85)
+        Minimum similarity for such a match to be learned as an alias;
+        matches between `min_ratio` and `learn_ratio` are not persisted
+    """
+    def __init__(self, path=None, min_ratio=0.5, learn_ratio=0.85):
+        self.path = os.path.expanduser(path) if path else None
+        self.min_ratio = min_ratio
+        self.learn_ratio = learn_ratio
+        self.aliases = {}
+        self.names = {}
+        self._dirty = False
+        if self.path and os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.aliases = data.get('aliases', {})
+            self.names = {abbr: set(names)
+                          for abbr, names in data.get('names', {}).items()}
+        for alias, abbr in SEED_ALIASES.items():
+            self.aliases.setdefault(alias, abbr)
+
+    @classmethod
+    def from_config(cls):
+        """
+        Index saved at `team_aliases.path` in the config, or
+        'team_aliases.json' under the `output` directory by default
+        """
+        settings = CONFIG.get('team_aliases') or {}
+        path = settings.get('path') \
+            or os.path.join(os.path.expanduser(CONFIG['output']),
+                            'team_aliases.json')
+        return cls(path, min_ratio=settings.get('min_ratio', 0.5),
+                   learn_ratio=settings.get('learn_ratio', 0.85))
+
+    def add_alias(self, alias, abbr):
+        key = normalize(alias)
+        if key and self.aliases.get(key) != abbr:
+            self.aliases[key] = abbr
+            self._dirty = True
+
+    def learn_team(self, abbr, name=None):
+        """
+        Register a scoreboard abbreviation, and optionally its display name
+        """
+        if not abbr:
+            return
+        self.add_alias(abbr, abbr)
+        if name:
+            key = normalize(name)
+            if key not in self.names.setdefault(abbr, set()):
+                self.names[abbr].add(key)
+                self._dirty = True
+
+    def learn_frame(self, game_data):
+        """
+        Register every home and away team of a game frame, eg. from
+        `GetGameData.game_data_df`
+        """
+        for side in ['home', 'away']:
+            teams = game_data[[f'{side}_abbr', f'{side}_team']] \
+                .drop_duplicates()
+            for abbr, name in teams.itertuples(index=False):
+                if isinstance(abbr, str):
+                    self.learn_team(abbr, name if isinstance(name, str)
+                                    else None)
+
+    def _similarity(self, key, abbr):
+        """
+        (subsequence, ratio) score of a normalized token against a team's
+        abbreviation and known names
+        """
+        forms = [normalize(abbr)] + sorted(self.names.get(abbr, ()))
+        return max((_is_subsequence(key, form),
+                    SequenceMatcher(None, key, form).ratio())
+                   for form in forms)
+
+    def resolve(self, token, candidates):
+        """
+        Resolve an odds-line token to one of the candidate abbreviations
+
+        Parameters
+        ----------
+        token : str
+            Team token from the odds line
+
+        candidates : tuple of str
+            Abbreviations the token may refer to, ie. the game's home and
+            away teams
+
+        Returns
+        -------
+        abbr : str or None
+            Matching abbreviation, or None if no candidate matches clearly
+        """
+        if token in candidates:
+            return token
+        key = normalize(token)
+        abbr = self.aliases.get(key)
+        if abbr in candidates:
+            return abbr
+
+        scores = sorted(((self._similarity(key, c), c)
+                         for c in candidates if isinstance(c, str)),
+                        reverse=True)
+        if not scores:
+            return None
+        (subsequence, ratio), best = scores[0]
+        clear = len(scores) == 1 or scores[1][0] < scores[0][0]
+        if not clear:
+            return None
+        if subsequence or ratio >= self.learn_ratio:
+            LOGGER.info("Learned team alias '%s' -> '%s'", token, best)
+            self.add_alias(key, best)
+            return best
+        if ratio >= self.min_ratio:
+            # Learned aliases are trusted before fuzzy matching, so a weak
+            # match is only used for this run
+            LOGGER.warning("Matched team alias '%s' -> '%s' with low "
+                           "similarity %.2f; not learned", token, best, ratio)
+            return best
+        return None
+
+    def resolve_favorites(self, game_data):
+        """
+        Resolve the odds favorite of every game in a frame. Tokens that
+        already equal the home or away abbreviation, or 'EVEN', are matched
+        in one vectorized comparison; the rest are resolved once per
+        distinct (token, home, away).
+
+        Returns
+        -------
+        favorites : numpy.ndarray
+            Home/away abbreviation or 'EVEN' per game, None where the
+            favorite could not be resolved or is missing
+        """
+        # Missing values (NaN or pd.NA in typed frames) become None, which
+        # compares unequal to every abbreviation instead of propagating NA
+        cols = game_data[['odds_line_fav', 'home_abbr', 'away_abbr']]
+        valid = cols['odds_line_fav'].notna().to_numpy()
+        fav, home, away = cols.astype(object).where(cols.notna(), None) \
+            .to_numpy().T
+
+        resolved = np.full(len(fav), None, dtype=object)
+        exact = valid & ((fav == home) | (fav == away) | (fav == 'EVEN'))
+        resolved[exact] = fav[exact]
+
+        lookups = {}
+        for i in np.flatnonzero(valid & ~exact):
+            if not isinstance(fav[i], str):
+                continue
+            key = (fav[i], home[i], away[i])
+            if key not in lookups:
+                lookups[key] = self.resolve(fav[i], (home[i], away[i]))
+            resolved[i] = lookups[key]
+        return resolved
+
+    def save(self):
+        """
+        Write the index to its path if anything was learned since it was
+        loaded or last saved
+        """
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'aliases': self.aliases,
+                       'names': {abbr: sorted(names)
+                                 for abbr, names in self.names.items()}},
+                      f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
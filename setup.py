@@ -10,6 +10,7 @@ setup(
                       'numpy',
                       'bs4',
                       'pytz',
+                      'pyarrow',
                       'pyyaml',
                       'google-api-core',
                       'google-api-python-client',